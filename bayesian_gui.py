@@ -1,18 +1,48 @@
+import math
+import queue
+import sqlite3
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from bayesian_network import BayesianNetwork
+from bayesian_network import BayesianNetwork, InferenceCancelled, InferenceMonitor
+from binary_format import BINARY_EXTENSION
+from inference_session import InferenceSession
+from profiling import format_stats
 
 """
 Clasa BayesianGUI se ocupa ce gestionarea aplicatiei
 grafice pentru lucrul cu reteaua bayesiana.
 """
 class BayesianGUI:
-    def __init__(self, root):
+    # costul estimat (intrari in tabelele intermediare) peste care inferenta exacta este considerata prea lenta
+    EXACT_COST_LIMIT = 10 ** 7
+    # timpul alocat inferentei aproximative, in secunde
+    APPROXIMATE_TIME_LIMIT = 2.0
+    # intervalul, in milisecunde, la care se verifica progresul inferentei care ruleaza in fundal
+    POLL_INTERVAL = 100
+    def __init__(self, root, result_cache_path=None):
+        """
+        Constructorul clasei BayesianGUI
+        :param root: fereastra principala
+        :param result_cache_path: fisierul SQLite in care rezultatele interogarilor se pastreaza intre sesiuni
+                                  (optional; implicit rezultatele se pastreaza doar in memorie)
+        """
         self.root = root
+        self.result_cache_path = result_cache_path
         self.root.title("Bayesian Network Inference")
         self.network = None
         self.evidence = {}
         self.remaining_nodes = []
+        # sesiunea incrementala (evidentele adaugate pe rand), disponibila cand reteaua are arbore de clici
+        self.session = None
+
+        # inferenta care ruleaza pe un fir separat: monitorul ei, coada prin care trimite rezultatul,
+        # momentul pornirii si starea butoanelor dezactivate pe durata ei
+        self.monitor = None
+        self.task_results = queue.Queue()
+        self.task_started = None
+        self.busy_buttons = {}
 
         # Top frame pentru controale
         self.control_frame = tk.Frame(root)
@@ -42,6 +72,16 @@ class BayesianGUI:
                                          state="disabled", width=15)
         self.pe_query_button.grid(row=2, column=3, padx=5, pady=5)
 
+        self.mpe_button = tk.Button(self.control_frame, text="MPE", command=self.mpe_query,
+                                    state="disabled", width=15)
+        self.mpe_button.grid(row=2, column=4, padx=5, pady=5)
+
+        # instrumentarea inferentei: statisticile ultimei interogari se afiseaza sub rezultat
+        self.profile_var = tk.BooleanVar(value=False)
+        self.profile_check = tk.Checkbutton(self.control_frame, text="Show Stats", variable=self.profile_var,
+                                            command=self.toggle_profiling)
+        self.profile_check.grid(row=0, column=0, padx=5)
+
         # Dropdown pentru evidente
         self.evidence_label = tk.Label(self.control_frame, text="Set Evidence:")
         self.evidence_label.grid(row=1, column=0, padx=5, pady=5)
@@ -77,36 +117,100 @@ class BayesianGUI:
         self.result_text = tk.Text(root, height=5, width=60, state="disabled")
         self.result_text.pack(pady=10)
 
+        # Text Box pentru statisticile ultimei interogari (vizibil doar cu "Show Stats")
+        self.stats_label = tk.Label(root, text="Query Stats:")
+        self.stats_text = tk.Text(root, height=6, width=60, state="disabled")
+
         self.irrelevant_button = tk.Button(self.control_frame, text="Find Irrelevant Nodes",
                                            command=self.show_irrelevant_nodes, state="disabled", width=20)
         self.irrelevant_button.grid(row=3, column=3, padx=5, pady=5)
 
+        # Progresul inferentei si butonul de oprire
+        self.progress_bar = ttk.Progressbar(self.control_frame, mode="determinate", maximum=1.0, length=300)
+        self.progress_bar.grid(row=3, column=0, columnspan=2, padx=5, pady=5)
+
+        self.cancel_button = tk.Button(self.control_frame, text="Cancel", command=self.cancel_task,
+                                       state="disabled", width=15)
+        self.cancel_button.grid(row=3, column=2, padx=5, pady=5)
+
+        self.status_label = tk.Label(root, text="")
+        self.status_label.pack()
 
 
     def load_network(self):
         """
-        Functie care incarca o retea bayesiana dintr-un fisier JSON ales de user.
+        Functie care incarca o retea bayesiana dintr-un fisier ales de user; formatul (JSON sau
+        binar) se alege dupa extensia fisierului.
         """
-        json_file = filedialog.askopenfilename(filetypes=[("JSON Files", "*.json")])
-        if json_file:
+        network_file = filedialog.askopenfilename(filetypes=[("Network Files", f"*.json *{BINARY_EXTENSION}"),
+                                                             ("JSON Files", "*.json"),
+                                                             ("Binary Networks", f"*{BINARY_EXTENSION}")])
+        if network_file:
             try:
-                self.network = BayesianNetwork(json_file)
-                self.remaining_nodes = list(self.network.network.keys())
+                network = BayesianNetwork(network_file)
+                # reteaua anterioara (incarcata fara "Delete Network") isi inchide fisierul cache-ului
+                self.close_result_cache()
+                self.network = network
+                try:
+                    self.network.enable_result_cache(path=self.result_cache_path)
+                except sqlite3.Error as e:
+                    self.network.enable_result_cache()
+                    messagebox.showwarning("Warning", f"Result cache file unavailable, caching in memory only: {e}")
+                if self.profile_var.get():
+                    self.network.enable_profiling()
+                # arborele de clici se construieste o singura data si este refolosit de interogari;
+                # pentru retelele prea mari interogarile se fac aproximativ, prin esantionare
+                if self.network.exact_cost() <= self.EXACT_COST_LIMIT:
+                    # arborele este in spatiul logaritmic, deci P(e) foarte mici raman reprezentabile
+                    self.network.compile(log_space=True)
+                    self.session = InferenceSession(self.network)
+                else:
+                    self.session = None
+                self.remaining_nodes = list(self.network.nodes)
                 self.update_dropdowns()
                 self.reset_button.config(state="normal")
                 self.pe_query_button.config(state="normal")
+                self.mpe_button.config(state="normal")
                 self.irrelevant_button.config(state="normal")
                 self.delete_network_button.config(state="normal")
                 messagebox.showinfo("Success", "Network loaded successfully!")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load network: {e}")
 
+    def toggle_profiling(self):
+        """
+        Functie care activeaza sau dezactiveaza instrumentarea inferentei si afisarea statisticilor
+        """
+        if self.profile_var.get():
+            self.stats_label.pack(before=self.status_label)
+            self.stats_text.pack(pady=10, before=self.status_label)
+            if self.network is not None:
+                self.network.enable_profiling()
+        else:
+            self.stats_label.pack_forget()
+            self.stats_text.pack_forget()
+            if self.network is not None:
+                self.network.disable_profiling()
+
+    def show_stats(self, lines):
+        """
+        Functie care afiseaza statisticile ultimei interogari
+        :param lines: liniile de afisat
+        """
+        self.stats_text.config(state="normal")
+        self.stats_text.delete("1.0", tk.END)
+        for line in lines:
+            self.stats_text.insert(tk.END, line)
+        self.stats_text.config(state="disabled")
+
     def reset_evidence(self):
         """
         Functie care reseteaza componentele grafice pentru a testa un nou caz in retea.
         """
         self.evidence = {}
-        self.remaining_nodes = list(self.network.network.keys())
+        self.remaining_nodes = list(self.network.nodes)
+        if self.session is not None:
+            self.session.reset()
 
         # Goleste TextBox evidente
         self.evidence_display_text.config(state="normal")
@@ -117,6 +221,7 @@ class BayesianGUI:
         self.result_text.config(state="normal")
         self.result_text.delete("1.0", tk.END)
         self.result_text.config(state="disabled")
+        self.show_stats([])
 
         # Reactualizeaza dropdown-urile
         self.evidence_node_var.set("")
@@ -125,11 +230,20 @@ class BayesianGUI:
 
         self.update_dropdowns()
 
+    def close_result_cache(self):
+        """
+        Functie care inchide fisierul cache-ului de rezultate al retelei curente (daca exista)
+        """
+        if self.network is not None and self.network.result_cache is not None:
+            self.network.result_cache.close()
+
     def delete_network(self):
         """
         Functie care sterge reteaua curenta si reseteaza interfata la starea initiala.
         """
+        self.close_result_cache()
         self.network = None
+        self.session = None
         self.evidence = {}
         self.remaining_nodes = []
 
@@ -152,6 +266,7 @@ class BayesianGUI:
         self.result_text.config(state="normal")
         self.result_text.delete("1.0", tk.END)
         self.result_text.config(state="disabled")
+        self.show_stats([])
 
         messagebox.showinfo("Network Deleted", "The current network has been deleted. Please load a new network.")
 
@@ -179,17 +294,9 @@ class BayesianGUI:
         Functie care actualizeaza dropdown-ul pentru valorile evidentelor.
         """
         selected_node = self.evidence_node_dropdown.get()
-        probabilities = self.network.network[selected_node]["probabilities"]
 
-        # extrag valorile posibile din chei
-        if isinstance(probabilities, dict):
-            first_key = next(iter(probabilities))
-            if isinstance(probabilities[first_key], dict):
-                possible_values = list(probabilities[first_key].keys())
-            else:
-                possible_values = list(probabilities.keys())
-        else:
-            possible_values = []
+        # valorile posibile sunt preluate din domeniile compilate ale retelei
+        possible_values = self.network.get_possible_values(selected_node)
 
         # actualizez dropdown-ul
         self.evidence_value_dropdown["values"] = possible_values
@@ -207,6 +314,9 @@ class BayesianGUI:
 
         if selected_node and selected_value:
             self.evidence[selected_node] = selected_value
+            if self.session is not None:
+                # doar mesajele care pleaca din clica nodului observat se vor recalcula
+                self.session.observe(selected_node, selected_value)
             self.remaining_nodes.remove(selected_node)
             self.update_dropdowns()
 
@@ -250,18 +360,24 @@ class BayesianGUI:
             messagebox.showerror("Error", "Please select a query node.")
             return
 
-        try:
-            self.network.set_evidence(self.evidence)
-            result = self.network.enumeration_ask(query_node)
+        network = self.network
+        session = self.session
+        evidence = dict(self.evidence)
 
-            self.result_text.config(state="normal")
-            self.result_text.delete("1.0", tk.END)
-            self.result_text.insert(tk.END, f"Probabilities for {query_node}:\n")
-            for value, prob in result.items():
-                self.result_text.insert(tk.END, f"{value}: {prob}\n")
-            self.result_text.config(state="disabled")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to query network: {e}")
+        def task():
+            if session is not None:
+                result = session.posterior(query_node)
+                header = f"Probabilities for {query_node}:\n"
+                lines = [f"{value}: {prob:.4f}\n" for value, prob in result.items()]
+            else:
+                network.set_evidence(evidence)
+                result = network.approximate_ask(query_node, time_limit=self.APPROXIMATE_TIME_LIMIT)
+                header = f"Approximate probabilities for {query_node} ({result.n_samples} samples):\n"
+                lines = [f"{value}: {prob:.4f} \u00b1 {result.std_error[value]:.4f}\n"
+                         for value, prob in result.distribution.items()]
+            return [header] + lines
+
+        self.run_task(task, "Failed to query network")
 
     def pe_query(self):
         """
@@ -275,14 +391,52 @@ class BayesianGUI:
             messagebox.showerror("Error", "No evidence set. Please add evidence first.")
             return
 
-        try:
-            result = self.network.p_e_query(self.evidence)
-            self.result_text.config(state="normal")
-            self.result_text.delete("1.0", tk.END)
-            self.result_text.insert(tk.END, f"P(e): {result:.4f}\n")
-            self.result_text.config(state="disabled")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to compute P(e): {e}")
+        network = self.network
+        session = self.session
+        evidence = dict(self.evidence)
+        # pentru retelele prea mari P(e) se estimeaza din ponderile likelihood weighting; esantionarea
+        # are nevoie de un nod neobservat, iar unul ramane mereu rezervat pentru interogare
+        sampled_node = self.remaining_nodes[0]
+
+        def task():
+            if session is not None:
+                # arborele sesiunii are deja mesajele evidentelor curente si este in spatiul logaritmic
+                log_p_e = session.probability_of_evidence()
+                header = ""
+            else:
+                network.set_evidence(evidence)
+                result = network.approximate_ask(sampled_node, time_limit=self.APPROXIMATE_TIME_LIMIT)
+                log_p_e = result.log_evidence
+                header = f"Approximate P(e) ({result.n_samples} samples):\n"
+            return [header, f"P(e): {math.exp(log_p_e):.4g}\n", f"log P(e): {log_p_e:.4f}\n"]
+
+        self.run_task(task, "Failed to compute P(e)")
+
+    def mpe_query(self):
+        """
+        Functie care calculeaza explicatia cea mai probabila: atribuirea comuna cea mai probabila
+        a nodurilor neobservate, data fiind evidenta curenta
+        """
+        if not self.network:
+            messagebox.showwarning("Warning", "Please load a network first!")
+            return
+
+        if self.session is None:
+            # max-produs are acelasi cost ca inferenta exacta, prea mare pentru aceasta retea
+            messagebox.showerror("Error", "The network is too large for an exact MPE query.")
+            return
+
+        network = self.network
+        evidence = dict(self.evidence)
+
+        def task():
+            assignment, log_probability = network.mpe(evidence, log_space=True)
+            lines = ["Most probable explanation:\n"]
+            lines += [f"{node}: {value}\n" for node, value in assignment.items()]
+            lines.append(f"P(x, e): {math.exp(log_probability):.4g} (log {log_probability:.4f})\n")
+            return lines
+
+        self.run_task(task, "Failed to compute MPE")
 
     def show_irrelevant_nodes(self):
         """
@@ -297,20 +451,111 @@ class BayesianGUI:
             messagebox.showerror("Error", "Please select a query node.")
             return
 
-        if query_node not in self.network.network:
+        if query_node not in self.network.node_index:
             messagebox.showerror("Error", f"Query node '{query_node}' does not exist in the network.")
             return
 
+        network = self.network
+        evidence = dict(self.evidence)
+
+        def task():
+            irrelevant_nodes = network.find_irrelevant_nodes(query_node, evidence)
+            lines = [f"Irrelevant Nodes for query '{query_node}':\n"]
+            if irrelevant_nodes:
+                lines += [f"{node}\n" for node in irrelevant_nodes]
+            else:
+                lines.append("No irrelevant nodes found.\n")
+            return lines
+
+        self.run_task(task, "Failed to find irrelevant nodes")
+
+    def run_task(self, task, error_message):
+        """
+        Functie care ruleaza o inferenta pe un fir separat, pentru ca fereastra sa nu se blocheze.
+        Rezultatul este preluat de poll_task, apelata periodic prin root.after.
+        :param task: functia care face inferenta si returneaza liniile de afisat
+        :param error_message: mesajul afisat daca inferenta esueaza
+        """
+        if self.monitor is not None:
+            return
+
+        self.monitor = InferenceMonitor()
+        self.network.monitor = self.monitor
+        if self.network.profiler is not None:
+            self.network.profiler.last_stats = None
+        self.task_started = time.perf_counter()
+
+        # butoanele care pornesc sau modifica o inferenta sunt dezactivate pana la final
+        for button in (self.load_button, self.reset_button, self.delete_network_button, self.add_evidence_button,
+                       self.query_button, self.pe_query_button, self.mpe_button, self.irrelevant_button,
+                       self.profile_check):
+            self.busy_buttons[button] = button.cget("state")
+            button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.progress_bar.config(mode="determinate", value=0)
+        self.status_label.config(text="Running...")
+
+        def work():
+            try:
+                self.task_results.put(("done", task()))
+            except InferenceCancelled:
+                self.task_results.put(("cancelled", None))
+            except Exception as e:
+                self.task_results.put(("error", f"{error_message}: {e}"))
+
+        threading.Thread(target=work, daemon=True).start()
+        self.root.after(self.POLL_INTERVAL, self.poll_task)
+
+    def poll_task(self):
+        """
+        Functie apelata periodic pe firul interfetei: actualizeaza progresul si afiseaza rezultatul inferentei
+        """
+        elapsed = time.perf_counter() - self.task_started
         try:
-            irrelevant_nodes = self.network.find_irrelevant_nodes(query_node, self.evidence)
+            status, result = self.task_results.get_nowait()
+        except queue.Empty:
+            progress = self.monitor.progress()
+            if progress is None:
+                # numarul total de pasi nu se cunoaste: bara se misca continuu
+                self.progress_bar.config(mode="indeterminate")
+                self.progress_bar.step(0.05)
+            else:
+                self.progress_bar.config(mode="determinate", value=progress)
+            self.status_label.config(text=f"Running... {elapsed:.1f} s")
+            self.root.after(self.POLL_INTERVAL, self.poll_task)
+            return
+
+        self.network.monitor = None
+        self.monitor = None
+        for button, state in self.busy_buttons.items():
+            button.config(state=state)
+        self.busy_buttons = {}
+        self.cancel_button.config(state="disabled")
+        self.progress_bar.config(mode="determinate", value=0)
+
+        if status == "done":
+            self.progress_bar.config(value=1.0)
+            self.status_label.config(text=f"Elapsed time: {elapsed:.3f} s")
             self.result_text.config(state="normal")
             self.result_text.delete("1.0", tk.END)
-            self.result_text.insert(tk.END, f"Irrelevant Nodes for query '{query_node}':\n")
-            if irrelevant_nodes:
-                for node in irrelevant_nodes:
-                    self.result_text.insert(tk.END, f"{node}\n")
-            else:
-                self.result_text.insert(tk.END, "No irrelevant nodes found.\n")
+            for line in result:
+                self.result_text.insert(tk.END, line)
             self.result_text.config(state="disabled")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to find irrelevant nodes: {e}")
+            if self.network.profiler is not None:
+                stats = self.network.query_stats()
+                self.show_stats(format_stats(stats) if stats is not None else
+                                ["No exact inference statistics for this query.\n"])
+        elif status == "cancelled":
+            self.status_label.config(text=f"Cancelled after {elapsed:.3f} s")
+        else:
+            self.status_label.config(text="")
+            messagebox.showerror("Error", result)
+
+    def cancel_task(self):
+        """
+        Functie care cere oprirea inferentei curente; aceasta se opreste la urmatorul pas.
+        """
+        if self.monitor is not None:
+            self.monitor.cancel()
+            self.cancel_button.config(state="disabled")
+            self.status_label.config(text="Cancelling...")
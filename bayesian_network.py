@@ -1,19 +1,393 @@
 import json
+import math
+import sys
+import threading
+import time
+from itertools import product
+from collections import deque
+import numpy as np
+from binary_format import BINARY_EXTENSION, load_network, network_hash, save_network
+from cache import LRUCache, ResultCache
+from junction_tree import JunctionTree
+from profiling import InferenceProfiler
+from sampling import gibbs_sampling, likelihood_weighting
+from variable_elimination import (build_factors, elimination_cost, elimination_order, log_sum, log_sum_exp,
+                                  max_product_assignment, variable_elimination_ask, variable_elimination_batch,
+                                  variable_elimination_p_e)
+
+"""
+Clasa PruningStats retine reducerea retelei facuta inainte de o inferenta
+"""
+class PruningStats:
+    def __init__(self, total_nodes, barren_nodes, d_separated_nodes, kept_nodes):
+        """
+        Constructorul clasei PruningStats
+        :param total_nodes: numarul de noduri din retea
+        :param barren_nodes: nodurile eliminate pentru ca nu sunt stramosi ai interogarii sau ai evidentelor
+        :param d_separated_nodes: nodurile eliminate pentru ca sunt d-separate de interogare de catre evidente
+        :param kept_nodes: nodurile pastrate pentru inferenta
+        """
+        self.total_nodes = total_nodes
+        self.barren_nodes = barren_nodes
+        self.d_separated_nodes = d_separated_nodes
+        self.kept_nodes = kept_nodes
+
+    def __repr__(self):
+        return (f"PruningStats(total={self.total_nodes}, barren={len(self.barren_nodes)}, "
+                f"d_separated={len(self.d_separated_nodes)}, kept={len(self.kept_nodes)})")
+
+
+"""
+Exceptia InferenceCancelled este ridicata cand o inferenta este oprita inainte de final
+"""
+class InferenceCancelled(Exception):
+    pass
+
+
+"""
+Clasa InferenceMonitor urmareste progresul unei inferente si permite oprirea ei cooperativa
+"""
+class InferenceMonitor:
+    def __init__(self):
+        """
+        Constructorul clasei InferenceMonitor
+        """
+        self.cancel_event = threading.Event()
+        self.done = 0
+        self.total = None
+
+    def start(self, total):
+        """
+        Functie care porneste numararea pasilor unei etape a inferentei
+        :param total: numarul estimat de pasi (ramuri, factori sau mesaje), sau None daca nu se cunoaste
+        """
+        self.done = 0
+        self.total = total
+
+    def step(self, count=1):
+        """
+        Functie apelata de algoritmi dupa fiecare pas; ridica InferenceCancelled daca s-a cerut oprirea
+        :param count: numarul de pasi efectuati
+        """
+        self.done += count
+        if self.cancel_event.is_set():
+            raise InferenceCancelled()
+
+    def cancel(self):
+        """
+        Functie care cere oprirea inferentei; aceasta se opreste la urmatorul pas
+        """
+        self.cancel_event.set()
+
+    def progress(self):
+        """
+        Functie care calculeaza progresul curent
+        :return: o valoare intre 0 si 1, sau None daca numarul total de pasi nu se cunoaste
+        """
+        if not self.total:
+            return None
+        return min(self.done / self.total, 1.0)
+
 
 """
 Clasa BayesianNetwork se ocupa ce gestionarea unei retele
-bayesiene incarcata dintr-un fisier JSON
+bayesiene incarcata dintr-un fisier JSON sau din formatul binar (vezi binary_format)
 """
 class BayesianNetwork:
-    def __init__(self, filename):
+    # numarul maxim de sume partiale pastrate de enumerarea memorata
+    MEMO_SIZE = 100000
+    # cadrele de stiva lasate liber pentru apelantii enumerarii recursive (vezi check_enumeration_depth)
+    RECURSION_MARGIN = 100
+    # tabelele derivate din cpts, construite la prima folosire (vezi __getattr__)
+    DERIVED_TABLES = ("log_cpts", "cpt_rows", "log_cpt_rows")
+
+    def __init__(self, filename, memo_size=None):
         """
         Constructorul clasei BayesianNetwork
-        Functie care incarca reteaua beyesiana dintr-un fisier JSON
-        :param filename: numele fisierului JSON
+        Functie care incarca reteaua beyesiana dintr-un fisier JSON sau, dupa extensie, dintr-un fisier binar
+        :param filename: numele fisierului JSON sau binar (*.bnet)
+        :param memo_size: numarul maxim de sume partiale pastrate de enumerarea memorata (implicit MEMO_SIZE)
         """
         self.evidence = {}
-        with open(filename, 'r') as file:
-            self.network = json.load(file)["nodes"]
+        self.junction_tree = None
+        self.last_pruning = None
+        # monitorul inferentei curente (progres si oprire), setat de interfata grafica
+        self.monitor = None
+        # instrumentarea inferentei, activata cu enable_profiling
+        self.profiler = None
+        # cache-ul sumelor partiale ale enumerarii memorate si planurile ei (frontierele fiecarei pozitii)
+        self.memo_cache = LRUCache(self.MEMO_SIZE if memo_size is None else memo_size)
+        self.memo_plans = LRUCache(1000)
+        self.next_memo_plan_id = 0
+        # cache-ul rezultatelor interogarilor, activat cu enable_result_cache
+        self.result_cache = None
+        # fisierul binar din care sunt mapate tabelele (None pentru retelele incarcate din JSON)
+        self.binary_path = None
+        # duratele incarcarii si ale ultimei construiri a arborelui de clici, in secunde
+        self.compile_time = None
+        started = time.perf_counter()
+        if filename.endswith(BINARY_EXTENSION):
+            self.load_binary(filename)
+        else:
+            with open(filename, 'r') as file:
+                self.network = json.load(file)["nodes"]
+            self.compile_network()
+        self.load_time = time.perf_counter() - started
+
+    def load_binary(self, filename):
+        """
+        Functie care incarca o retea deja compilata din formatul binar; tabelele sunt mapate din fisier
+        (numpy.memmap, doar citire), deci nu se copiaza in memorie
+        :param filename: numele fisierului binar
+        """
+        header, self.cpts = load_network(filename)
+        self.binary_path = filename
+        # reteaua a fost validata inainte de export, iar tabelul JSON original nu mai exista
+        self.network = None
+        self.nodes = header["nodes"]
+        self.domains = header["domains"]
+        self.parent_indices = [tuple(parents) for parents in header["parents"]]
+        self.index_network()
+        self.content_hash = header["content_hash"]
+
+    def compile_network(self):
+        """
+        Functie care compileaza tabelele de probabilitate din JSON intr-o reprezentare indexata:
+        fiecare nod primeste un domeniu indexat cu intregi si un tabel numpy cu cate o axa
+        pentru fiecare parinte plus una pentru nodul insusi
+        """
+        # nodurile sunt indexate in ordine topologica, astfel incat orice lista de indici sortata
+        # crescator are parintii inaintea copiilor
+        self.nodes = self.validate_network()
+        self.node_index = {node: i for i, node in enumerate(self.nodes)}
+
+        # domeniile nodurilor, extrase o singura data din tabelele de probabilitate
+        self.domains = [self.node_domain(node) for node in self.nodes]
+
+        self.parent_indices = []
+        self.cpts = []
+        for node in self.nodes:
+            parents = [self.node_index[parent] for parent in self.network[node]["parents"]]
+            probabilities = self.network[node]["probabilities"]
+            domain = self.domains[self.node_index[node]]
+            cpt = np.empty([len(self.domains[p]) for p in parents] + [len(domain)])
+
+            if not parents:
+                cpt[:] = [probabilities[value] for value in domain]
+            else:
+                for combination in np.ndindex(*cpt.shape[:-1]):
+                    key = ",".join(self.domains[p][i] for p, i in zip(parents, combination))
+                    cpt[combination] = [probabilities[key][value] for value in domain]
+
+            self.parent_indices.append(tuple(parents))
+            self.cpts.append(cpt)
+
+        self.index_network()
+        self.content_hash = network_hash(self.nodes, self.domains, self.parent_indices, self.cpts)
+
+    def index_network(self):
+        """
+        Functie care construieste indexurile retelei compilate: indicii nodurilor si valorilor,
+        listele de copii si pasii (strides) randurilor din tabele
+        """
+        self.node_index = {node: i for i, node in enumerate(self.nodes)}
+        self.value_index = [{value: i for i, value in enumerate(domain)} for domain in self.domains]
+
+        # listele de adiacenta, O(N+E); stramosii se calculeaza la fiecare interogare (vezi ancestors)
+        self.children = [[] for _ in self.nodes]
+        for node, parents in enumerate(self.parent_indices):
+            for parent in parents:
+                self.children[parent].append(node)
+        self.children = [tuple(children) for children in self.children]
+
+        # pentru enumerare, fiecare tabel este vazut ca o lista de randuri (cate unul pentru
+        # fiecare combinatie de valori a parintilor); randul se afla cu ajutorul pasilor (strides)
+        self.parent_strides = []
+        for node in range(len(self.nodes)):
+            strides = []
+            stride = 1
+            for parent in reversed(self.parent_indices[node]):
+                strides.append(stride)
+                stride *= len(self.domains[parent])
+            self.parent_strides.append(tuple(reversed(strides)))
+
+    def __getattr__(self, name):
+        # apelata doar pentru atributele care lipsesc: tabelele derivate se construiesc la prima
+        # folosire si raman apoi atribute obisnuite, fara cost la accesarile urmatoare
+        if name not in BayesianNetwork.DERIVED_TABLES or "cpts" not in self.__dict__:
+            raise AttributeError(name)
+        if name == "log_cpts":
+            # logaritmii probabilitatilor, pentru inferenta in spatiul logaritmic (log 0 = -inf)
+            with np.errstate(divide="ignore"):
+                self.log_cpts = [np.log(cpt) for cpt in self.cpts]
+        elif name == "cpt_rows":
+            self.cpt_rows = [cpt.reshape(-1, cpt.shape[-1]).tolist() for cpt in self.cpts]
+        else:
+            self.log_cpt_rows = [cpt.reshape(-1, cpt.shape[-1]).tolist() for cpt in self.log_cpts]
+        return self.__dict__[name]
+
+    def __getstate__(self):
+        # monitorul si cache-ul rezultatelor contin obiecte de sincronizare si conexiuni
+        # si nu se trimit altor procese; nici instrumentarea nu se trimite
+        state = dict(self.__dict__)
+        state["monitor"] = None
+        state["result_cache"] = None
+        if self.profiler is not None:
+            for name in self.profiler.wrapped_methods():
+                state.pop(name, None)
+            state["profiler"] = None
+        if self.binary_path is not None:
+            # tabelele mapate nu se copiaza: fiecare proces mapeaza acelasi fisier
+            for name in ("cpts",) + BayesianNetwork.DERIVED_TABLES:
+                state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.binary_path is not None:
+            _, self.cpts = load_network(self.binary_path)
+
+    def save_binary(self, filename, dtype="float64"):
+        """
+        Functie care exporta reteaua in formatul binar compact, incarcat apoi prin BayesianNetwork(filename)
+        :param filename: numele fisierului binar (*.bnet)
+        :param dtype: "float64" sau "float32"
+        """
+        save_network(self, filename, dtype)
+
+    def node_domain(self, node):
+        """
+        Functie care extrage valorile posibile ale unui nod din tabelul sau de probabilitate din JSON
+        :param node: numele nodului din retea
+        :return: lista valorilor nodului
+        """
+        probabilities = self.network[node]["probabilities"]
+        first = next(iter(probabilities.values()))
+        return list(first.keys()) if isinstance(first, dict) else list(probabilities.keys())
+
+    def validate_network(self, tolerance=1e-6):
+        """
+        Functie care verifica structura retelei incarcate: parinti existenti, absenta ciclurilor,
+        domenii consistente si randuri de probabilitati cu suma 1
+        :param tolerance: abaterea permisa fata de 1 pentru suma unui rand
+        :return: lista nodurilor in ordine topologica
+        """
+        for node, data in self.network.items():
+            if not isinstance(data.get("parents"), list) or not isinstance(data.get("probabilities"), dict) \
+                    or not data["probabilities"]:
+                raise ValueError(f"Node '{node}' must have a 'parents' list and a non-empty 'probabilities' table")
+            for parent in data["parents"]:
+                if parent not in self.network:
+                    raise ValueError(f"Node '{node}' has unknown parent '{parent}'")
+            if len(set(data["parents"])) != len(data["parents"]):
+                raise ValueError(f"Node '{node}' lists the same parent more than once")
+
+        graph = {node: [] for node in self.network}
+        for child, data in self.network.items():
+            for parent in data["parents"]:
+                graph[parent].append(child)
+        order = kahn_topological_sort(graph)
+        if order is None:
+            raise ValueError("Network contains a cycle")
+
+        domains = {}
+        for node in order:
+            parents = self.network[node]["parents"]
+            probabilities = self.network[node]["probabilities"]
+            rows = {(): probabilities} if not parents else probabilities
+
+            domain = self.node_domain(node)
+            expected = {",".join(combination) for combination in product(*(domains[p] for p in parents))}
+            if parents and set(rows) != expected:
+                missing = sorted(expected - set(rows))
+                extra = sorted(set(rows) - expected)
+                raise ValueError(f"Node '{node}' has inconsistent parent combinations "
+                                 f"(missing: {missing}, unexpected: {extra})")
+
+            for key, row in rows.items():
+                if not isinstance(row, dict) or set(row) != set(domain):
+                    raise ValueError(f"Node '{node}' has inconsistent values in row '{key}'")
+                if any(not isinstance(prob, (int, float)) or prob < 0 for prob in row.values()):
+                    raise ValueError(f"Node '{node}' has invalid probabilities in row '{key}'")
+                if abs(sum(row.values()) - 1.0) > tolerance:
+                    raise ValueError(f"Probabilities of node '{node}' in row '{key}' sum to {sum(row.values())}, not 1")
+            domains[node] = domain
+        return order
+
+    def enable_result_cache(self, maxsize=10000, path=None, disk_maxsize=100000):
+        """
+        Functie care activeaza cache-ul rezultatelor pentru enumeration_ask si p_e_query
+        :param maxsize: numarul maxim de rezultate pastrate in memorie
+        :param path: fisierul SQLite in care rezultatele se pastreaza intre sesiuni (optional)
+        :param disk_maxsize: numarul maxim de rezultate pastrate in fisier
+        :return: cache-ul creat
+        """
+        self.result_cache = ResultCache(maxsize, path, disk_maxsize)
+        return self.result_cache
+
+    def enable_profiling(self, callback=None):
+        """
+        Functie care activeaza instrumentarea inferentei: dupa fiecare interogare exacta, statisticile ei
+        (numarul de apeluri, ramuri, durata fiecarei faze, ratele de gasire in cache-uri) sunt disponibile
+        prin query_stats si sunt trimise functiilor adaugate cu profiler.add_callback
+        :param callback: o functie apelata cu statisticile fiecarei interogari (optional)
+        :return: obiectul InferenceProfiler
+        """
+        if self.profiler is None:
+            self.profiler = InferenceProfiler(self)
+            self.profiler.attach()
+        if callback is not None:
+            self.profiler.add_callback(callback)
+        return self.profiler
+
+    def disable_profiling(self):
+        """
+        Functie care dezactiveaza instrumentarea; interogarile revin la metodele neinstrumentate
+        """
+        if self.profiler is not None:
+            self.profiler.detach()
+            self.profiler = None
+
+    def query_stats(self):
+        """
+        Functie care returneaza statisticile ultimei interogari
+        :return: un dictionar de statistici, sau None daca instrumentarea nu este activata sau nu s-a facut nicio interogare
+        """
+        return self.profiler.last_stats if self.profiler is not None else None
+
+    def compile(self, log_space=False):
+        """
+        Functie care construieste arborele de clici (junction tree) al retelei, folosit de
+        interogarile repetate cu algoritmul "junction_tree"
+        :param log_space: True pentru potentiale si mesaje in spatiul logaritmic
+        :return: arborele de clici
+        """
+        started = time.perf_counter()
+        self.junction_tree = JunctionTree(self, log_space=log_space)
+        self.compile_time = time.perf_counter() - started
+        return self.junction_tree
+
+    def compiled_tree(self, log_space):
+        """
+        Functie care preia arborele de clici in modul cerut, reconstruindu-l daca lipseste sau are alt mod
+        :param log_space: True pentru arborele in spatiul logaritmic
+        :return: arborele de clici
+        """
+        if self.junction_tree is None or self.junction_tree.log_space != log_space:
+            return self.compile(log_space)
+        return self.junction_tree
+
+    def encode_evidence(self, evidence):
+        """
+        Functie care codifica evidentele ca indici intregi
+        :param evidence: un dictionar de perechi nod:valoare
+        :return: o lista cu indicele valorii observate pentru fiecare nod (-1 pentru nodurile neobservate)
+        """
+        assignment = [-1] * len(self.nodes)
+        for node, value in evidence.items():
+            index = self.node_index[node]
+            assignment[index] = self.value_index[index][value]
+        return assignment
 
     def set_evidence(self, evidence):
         """
@@ -24,43 +398,376 @@ class BayesianNetwork:
 
     def get_possible_values(self, node):
         """
-        Functie care preia valorile posibile pentru un nod din retea, pe baza tabelelor de probabilitate
+        Functie care preia valorile posibile pentru un nod din retea, pe baza domeniilor compilate
         :param node: numele nodului din retea
         :return: returneaza o lista de valori posibile pentru un nod din retea
         """
-        probabilities = self.network[node]["probabilities"]
-        # se verifica structura tabelelor de probabilitate:
-        # daca sunt probabilitati conditionate, se extrag cheile
-        # daca sunt marginale, se extrag direct cheile
-        if isinstance(next(iter(probabilities.values())), dict):
-            return list(next(iter(probabilities.values())).keys())
-        else:
-            return list(probabilities.keys())
+        return list(self.domains[self.node_index[node]])
+
+    def ancestors(self, nodes):
+        """
+        Functie care calculeaza multimea stramosilor unor noduri (inclusiv nodurile insele), printr-o singura
+        parcurgere inversa pe listele de parinti, O(N+E)
+        :param nodes: indicii nodurilor
+        :return: o multime de indici
+        """
+        result = set(nodes)
+        stack = list(result)
+        while stack:
+            for parent in self.parent_indices[stack.pop()]:
+                if parent not in result:
+                    result.add(parent)
+                    stack.append(parent)
+        return result
 
-    def enumeration_ask(self, query_node):
+    def bayes_ball(self, query_nodes, assignment):
         """
-        Functie care se ocupa de inferenta prin enumerare
+        Functie care parcurge reteaua cu algoritmul Bayes-ball (Shachter), in timp O(N+E)
+        :param query_nodes: indicii nodurilor interogate
+        :param assignment: indicii valorilor observate pentru fiecare nod (-1 pentru nodurile neobservate)
+        :return: nodurile ale caror tabele sunt necesare (marcate "sus") si nodurile vizitate
+        """
+        top, bottom, visited = set(), set(), set()
+        # fiecare element din lista: (nod, True daca mingea vine de la un copil)
+        schedule = [(node, True) for node in query_nodes]
+        while schedule:
+            node, from_child = schedule.pop()
+            visited.add(node)
+            observed = assignment[node] >= 0
+
+            if not observed and from_child:
+                # un nod neobservat lasa mingea sa treaca atat spre parinti cat si spre copii
+                if node not in top:
+                    top.add(node)
+                    schedule.extend((parent, True) for parent in self.parent_indices[node])
+                if node not in bottom:
+                    bottom.add(node)
+                    schedule.extend((child, False) for child in self.children[node])
+            elif not from_child:
+                if observed:
+                    # structura v: un nod observat intoarce mingea venita de la un parinte spre parinti
+                    if node not in top:
+                        top.add(node)
+                        schedule.extend((parent, True) for parent in self.parent_indices[node])
+                elif node not in bottom:
+                    bottom.add(node)
+                    schedule.extend((child, False) for child in self.children[node])
+        return top, visited
+
+    def relevant_nodes(self, query_node, evidence):
+        """
+        Functie care imparte nodurile retelei in relevante si irelevante pentru o interogare,
+        printr-o singura parcurgere Bayes-ball
         :param query_node: nodul interogat
+        :param evidence: un dictionar de perechi nod:valoare
+        :return: multimea nodurilor relevante (tabele necesare si evidente care influenteaza rezultatul)
+                 si multimea nodurilor irelevante
+        """
+        query_index, assignment = self.query_assignment(query_node, evidence)
+        top, visited = self.bayes_ball([query_index], assignment)
+        relevant = top | {node for node in visited if assignment[node] >= 0} | {query_index}
+        return ({self.nodes[node] for node in relevant},
+                {self.nodes[node] for node in range(len(self.nodes)) if node not in relevant})
+
+    def prune(self, query_node, assignment):
+        """
+        Functie care elimina nodurile inutile pentru o interogare: nodurile sterpe (care nu sunt
+        stramosi ai interogarii sau ai evidentelor) si nodurile d-separate de interogare de catre evidente
+        :param query_node: indicele nodului interogat
+        :param assignment: indicii valorilor observate pentru fiecare nod (-1 pentru nodurile neobservate)
+        :return: lista indicilor nodurilor ale caror tabele sunt necesare, in ordinea retelei
+        """
+        observed = [node for node, value in enumerate(assignment) if value >= 0]
+        ancestral = self.ancestors(observed + [query_node])
+
+        # tabelele necesare sunt cele ale nodurilor marcate "sus" de Bayes-ball; restul factorilor
+        # nu depind de interogare si se simplifica la normalizare
+        top, _ = self.bayes_ball([query_node], assignment)
+        kept = sorted(top)
+        self.last_pruning = self.pruning_stats(ancestral, kept)
+        return kept
+
+    def prune_for_evidence(self, assignment):
+        """
+        Functie care elimina nodurile sterpe pentru calculul P(E=e), adica nodurile care nu sunt stramosi ai evidentelor
+        :param assignment: indicii valorilor observate pentru fiecare nod (-1 pentru nodurile neobservate)
+        :return: lista indicilor nodurilor ale caror tabele sunt necesare, in ordinea retelei
+        """
+        ancestral = self.ancestors([node for node, value in enumerate(assignment) if value >= 0])
+        kept = [node for node in range(len(self.nodes)) if node in ancestral]
+        self.last_pruning = self.pruning_stats(ancestral, kept)
+        return kept
+
+    def prune_for_map(self, maximized, assignment):
+        """
+        Functie care elimina nodurile sterpe pentru o interogare MAP, adica nodurile care nu sunt stramosi
+        ai nodurilor cautate sau ai evidentelor; tabelele lor se sumeaza la 1. Nodurile d-separate nu se elimina,
+        deoarece schimba probabilitatea comuna raportata (desi nu si atribuirea cea mai probabila).
+        :param maximized: indicii nodurilor pentru care se cauta atribuirea
+        :param assignment: indicii valorilor observate pentru fiecare nod (-1 pentru nodurile neobservate)
+        :return: lista indicilor nodurilor ale caror tabele sunt necesare, in ordinea retelei
+        """
+        ancestral = self.ancestors([node for node, value in enumerate(assignment) if value >= 0] + list(maximized))
+        kept = [node for node in range(len(self.nodes)) if node in ancestral]
+        self.last_pruning = self.pruning_stats(ancestral, kept)
+        return kept
+
+    def pruning_stats(self, ancestral, kept):
+        """
+        Functie care construieste statisticile reducerii retelei
+        :param ancestral: nodurile care nu sunt sterpe
+        :param kept: nodurile pastrate
+        :return: un obiect PruningStats
+        """
+        kept_set = set(kept)
+        return PruningStats(len(self.nodes),
+                            [self.nodes[node] for node in range(len(self.nodes)) if node not in ancestral],
+                            [self.nodes[node] for node in range(len(self.nodes))
+                             if node in ancestral and node not in kept_set],
+                            [self.nodes[node] for node in kept])
+
+    def enumeration_ask(self, query_node, algorithm="enumeration", log_space=False):
+        """
+        Functie care se ocupa de inferenta prin enumerare sau prin eliminarea variabilelor
+        :param query_node: nodul interogat
+        :param algorithm: "enumeration" (enumerare completa), "memoized" (enumerare cu sume partiale memorate),
+                          "variable_elimination" sau "junction_tree" (arborele de clici construit de compile(),
+                          refolosit intre interogari)
+        :param log_space: True pentru calcul in spatiul logaritmic (log-sum-exp), stabil numeric
+                          pe retele adanci sau cu evidente rare
         :return: o distributie de probabilitate normalizata pt. variabila interogata
         """
-        # o lista a tuturor variabilelelor din retea
-        variables = list(self.network.keys())
-        query_probs = {}
+        evidence = {node: value for node, value in self.evidence.items() if node != query_node}
+        return self.cached_result("query", query_node, evidence,
+                                  lambda: self.compute_ask(query_node, algorithm, log_space))
 
-        # se obtin toate valorile pentru nodul interogat si se calculeaza probabilitatile acestora
-        possible_values = self.get_possible_values(query_node)
-        for value in possible_values:
-            query_probs[value] = self.enumerate_all(variables, {**self.evidence, query_node: value})
+    def cached_result(self, kind, query, evidence, compute):
+        """
+        Functie care cauta rezultatul unei interogari in cache-ul de rezultate (daca este activat),
+        calculandu-l si pastrandu-l daca lipseste
+        :param kind: tipul interogarii ("query", "p_e", "log_p_e", "map" sau "log_map")
+        :param query: nodul interogat (None pentru P(E=e), lista nodurilor pentru MAP)
+        :param evidence: un dictionar de perechi nod:valoare
+        :param compute: functia care calculeaza rezultatul
+        :return: rezultatul (o copie, pentru distributii)
+        """
+        if self.result_cache is None:
+            return compute()
+        key = ResultCache.make_key(self.content_hash, kind, query, evidence)
+        cached = self.result_cache.get(key)
+        if cached is None:
+            cached = compute()
+            self.result_cache.put(key, cached)
+        # si la prima calculare se returneaza o copie, astfel incat apelantul nu poate modifica rezultatul din cache
+        return dict(cached) if isinstance(cached, dict) else cached
 
+    def compute_ask(self, query_node, algorithm, log_space=False):
+        """
+        Functie care calculeaza distributia nodului interogat cu algoritmul dat, fara cache-ul de rezultate
+        :param query_node: nodul interogat
+        :param algorithm: algoritmul de inferenta (vezi enumeration_ask)
+        :param log_space: True pentru calcul in spatiul logaritmic
+        :return: o distributie de probabilitate normalizata pt. variabila interogata
+        """
+        query_index, assignment = self.query_assignment(query_node, self.evidence)
+
+        if algorithm == "variable_elimination":
+            query_probs = variable_elimination_ask(self, query_index, assignment,
+                                                   self.prune(query_index, assignment), log_space=log_space)
+        elif algorithm == "junction_tree":
+            tree = self.compiled_tree(log_space)
+            tree.set_assignment(assignment)
+            query_probs = tree.node_belief(query_index)
+        elif algorithm == "memoized":
+            variables = self.prune(query_index, assignment)
+            if self.monitor is not None:
+                self.monitor.start(None)
+            assignment[query_index] = 0
+            plan = self.memo_plan(variables, assignment, log_space)
+            query_probs = []
+            for value in range(len(self.domains[query_index])):
+                assignment[query_index] = value
+                query_probs.append(self._enumerate_memo(plan, 0, assignment))
+        elif algorithm == "enumeration":
+            # o lista a variabilelor din retea care raman dupa eliminarea celor inutile
+            variables = self.prune(query_index, assignment)
+            self.check_enumeration_depth(variables)
+            query_probs = []
+
+            if self.monitor is not None:
+                # nodul interogat este inca neobservat, deci valorile lui sunt incluse in numarul de ramuri
+                self.monitor.start(self.enumeration_size(variables, assignment))
+
+            # se obtin toate valorile pentru nodul interogat si se calculeaza probabilitatile acestora
+            enumerate_fn = self._enumerate_log if log_space else self._enumerate_all
+            for value in range(len(self.domains[query_index])):
+                assignment[query_index] = value
+                query_probs.append(enumerate_fn(variables, 0, assignment))
+        else:
+            raise ValueError(f"Unknown inference algorithm: {algorithm}")
+        return self.normalize(query_index, query_probs, log_space)
+
+    def enumeration_size(self, variables, assignment):
+        """
+        Functie care calculeaza numarul de ramuri complete parcurse de enumerare
+        :param variables: lista indicilor nodurilor
+        :param assignment: indicii valorilor observate pentru fiecare nod (-1 pentru nodurile neobservate)
+        :return: produsul marimilor domeniilor nodurilor neobservate
+        """
+        size = 1
+        for node in variables:
+            if assignment[node] < 0:
+                size *= len(self.domains[node])
+        return size
+
+    def query_assignment(self, query_node, evidence):
+        """
+        Functie care pregateste o interogare: indicele nodului interogat si evidentele codificate,
+        fara nodul interogat
+        :param query_node: nodul interogat
+        :param evidence: un dictionar de perechi nod:valoare
+        :return: indicele nodului interogat si lista indicilor valorilor observate
+        """
+        query_index = self.node_index[query_node]
+        return query_index, self.encode_evidence({node: value for node, value in evidence.items()
+                                                  if node != query_node})
+
+    def normalize(self, query_index, query_probs, log_space=False):
+        """
+        Functie care transforma probabilitatile nenormalizate ale valorilor nodului interogat intr-o distributie;
+        rezultatele nu se rotunjesc (rotunjirea se face doar la afisare)
+        :param query_index: indicele nodului interogat
+        :param query_probs: lista probabilitatilor nenormalizate (sau a logaritmilor lor), in ordinea domeniului
+        :param log_space: True daca query_probs contine logaritmi
+        :return: o distributie de probabilitate normalizata, un dictionar valoare:probabilitate
+        """
         # se normalizeaza probabilitatile pentru a asigura ca au suma 1
-        alpha = sum(query_probs.values())
-        for k in query_probs:
-            query_probs[k] /= alpha
+        if log_space:
+            log_alpha = log_sum(query_probs)
+            if log_alpha == -math.inf:
+                raise ValueError("Evidence has zero probability")
+            query_probs = [math.exp(log_prob - log_alpha) for log_prob in query_probs]
+        else:
+            alpha = sum(query_probs)
+            if alpha == 0:
+                raise ValueError("Evidence has zero probability")
+            query_probs = [prob / alpha for prob in query_probs]
+
+        return dict(zip(self.domains[query_index], query_probs))
+
+    def approximate_ask(self, query_node, method="likelihood_weighting", n_samples=None, time_limit=None, seed=None):
+        """
+        Functie care se ocupa de inferenta aproximativa prin esantionare, pentru retelele prea mari
+        pentru inferenta exacta
+        :param query_node: nodul interogat
+        :param method: "likelihood_weighting" sau "gibbs"
+        :param n_samples: numarul de esantioane dorit
+        :param time_limit: timpul maxim de calcul, in secunde (se foloseste impreuna cu sau in locul lui n_samples)
+        :param seed: samanta generatorului de numere aleatoare, pentru rezultate reproductibile
+        :return: un obiect SamplingResult cu distributia estimata si eroarea standard
+        """
+        query_index, assignment = self.query_assignment(query_node, self.evidence)
+        rng = np.random.default_rng(seed)
+
+        if method == "likelihood_weighting":
+            return likelihood_weighting(self, query_index, assignment, n_samples, time_limit, rng=rng)
+        if method == "gibbs":
+            return gibbs_sampling(self, query_index, assignment, n_samples, time_limit, rng=rng)
+        raise ValueError(f"Unknown sampling method: {method}")
+
+    def exact_cost(self, query_node=None):
+        """
+        Functie care estimeaza costul inferentei exacte (numarul de intrari din tabelele intermediare
+        ale eliminarii variabilelor), fara a o efectua
+        :param query_node: nodul interogat, cu evidentele curente; daca lipseste se estimeaza costul
+                           pentru intreaga retea (cel al arborelui de clici)
+        :return: costul estimat
+        """
+        if query_node is None:
+            nodes = range(len(self.nodes))
+            factors = build_factors(self, nodes, [-1] * len(self.nodes))
+            return elimination_cost(self, factors, elimination_order(factors, nodes))
 
-        # se rotunjesc rezultatele la 4 zecimale
-        query_probs = {k: round(v, 4) for k, v in query_probs.items()}
+        query_index, assignment = self.query_assignment(query_node, self.evidence)
+        nodes = self.prune(query_index, assignment)
+        factors = build_factors(self, nodes, assignment)
+        hidden = [node for node in nodes if node != query_index and assignment[node] < 0]
+        return elimination_cost(self, factors, elimination_order(factors, hidden))
 
-        return query_probs
+    def encode_evidence_rows(self, evidence_rows):
+        """
+        Functie care codifica un lot de seturi de evidente ca indici intregi, coloana cu coloana
+        :param evidence_rows: o lista de dictionare nod:valoare, un dictionar nod:coloana de valori
+                              (None pentru randurile in care nodul nu este observat) sau o matrice
+                              numpy (nr. randuri, nr. noduri) de indici de valori, cu -1 pentru lipsa
+        :return: numarul de randuri si un dictionar indice nod:vector de indici de valori
+        """
+        if isinstance(evidence_rows, np.ndarray):
+            if evidence_rows.ndim != 2 or evidence_rows.shape[1] != len(self.nodes):
+                raise ValueError("Evidence array must have shape (n_rows, n_nodes)")
+            codes = evidence_rows.astype(np.int64)
+            return len(codes), {node: codes[:, node] for node in range(len(self.nodes))
+                                if (codes[:, node] >= 0).any()}
+
+        if isinstance(evidence_rows, dict):
+            columns = evidence_rows
+            lengths = {len(column) for column in columns.values()}
+            if len(lengths) > 1:
+                raise ValueError("Evidence columns must have the same length")
+            n_rows = lengths.pop() if lengths else 0
+        else:
+            n_rows = len(evidence_rows)
+            observed = {node for row in evidence_rows for node in row}
+            columns = {node: [row.get(node) for row in evidence_rows] for node in observed}
+
+        encoded = {}
+        for node, column in columns.items():
+            index = self.node_index[node]
+            column = np.asarray(column, dtype=object)
+            codes = np.full(n_rows, -1, dtype=np.int64)
+            for value_index, value in enumerate(self.domains[index]):
+                codes[column == value] = value_index
+            unknown = (codes < 0) & np.not_equal(column, None)
+            if unknown.any():
+                raise ValueError(f"Unknown value '{column[unknown][0]}' for node '{node}'")
+            encoded[index] = codes
+        return n_rows, encoded
+
+    def query_batch(self, query_node, evidence_rows, log_space=False):
+        """
+        Functie care calculeaza distributia nodului interogat pentru fiecare set de evidente
+        dintr-un lot, printr-o singura trecere vectorizata
+        :param query_node: nodul interogat
+        :param evidence_rows: seturile de evidente (vezi encode_evidence_rows)
+        :param log_space: True pentru calcul in spatiul logaritmic
+        :return: o matrice numpy (nr. randuri, nr. valori ale nodului interogat) cu distributiile
+                 normalizate; randurile cu evidente imposibile contin nan
+        """
+        query_index = self.node_index[query_node]
+        n_rows, encoded = self.encode_evidence_rows(evidence_rows)
+
+        # fiecare nod observat devine un factor (rand, valoare) cu 1 pe valoarea observata,
+        # iar in randurile in care nodul nu este observat toate valorile sunt permise
+        likelihoods = {}
+        for node, codes in encoded.items():
+            if node == query_index:
+                continue
+            table = np.ones((n_rows, len(self.domains[node])))
+            observed = codes >= 0
+            table[observed] = 0.0
+            table[observed, codes[observed]] = 1.0
+            if log_space:
+                with np.errstate(divide="ignore"):
+                    table = np.log(table)
+            likelihoods[node] = table
+
+        # nodurile sterpe fata de interogare si de toate nodurile observate in lot nu influenteaza rezultatul
+        nodes = sorted(self.ancestors(list(likelihoods) + [query_index]))
+        query_probs = variable_elimination_batch(self, query_index, n_rows, likelihoods, nodes, log_space=log_space)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if log_space:
+                return np.exp(query_probs - log_sum_exp(query_probs, 1)[:, None])
+            return query_probs / query_probs.sum(axis=1, keepdims=True)
 
     # Algoritmul de Enumerare pentru Retele Bayesiene
     def enumerate_all(self, nodes_list, evidence):
@@ -70,27 +777,175 @@ class BayesianNetwork:
                 evidence: nodurile observate
         :return: o valoare tip procent
         """
-        if not nodes_list:
-            # daca nu exista noduri in retea se returneaza 1
+        # nodurile se parcurg in ordine topologica, astfel incat parintii au valori inaintea copiilor
+        variables = sorted(self.node_index[node] for node in nodes_list)
+        self.check_enumeration_depth(variables)
+        return self._enumerate_all(variables, 0, self.encode_evidence(evidence))
+
+    def check_enumeration_depth(self, variables):
+        """
+        Functie care verifica, inainte de enumerarea recursiva, ca adancimea recursiei (cate un nivel pentru
+        fiecare nod pastrat, doua cu instrumentarea activata) incape in limita de recursie a interpretorului
+        :param variables: lista indicilor nodurilor enumerate
+        """
+        frames = len(variables) * (2 if self.profiler is not None else 1) + self.RECURSION_MARGIN
+        if frames > sys.getrecursionlimit():
+            raise ValueError(f"Network too deep for recursive enumeration ({len(variables)} nodes after pruning); "
+                             f"use the 'memoized', 'variable_elimination' or 'junction_tree' algorithm")
+
+    def _enumerate_all(self, variables, position, assignment):
+        """
+        Varianta indexata a enumerarii: nodurile si valorile sunt indici intregi, iar
+        atribuirea curenta este modificata pe loc in loc sa fie copiata la fiecare pas
+        :param variables: lista indicilor nodurilor
+        :param position: pozitia nodului curent in variables
+        :param assignment: indicii valorilor pentru fiecare nod (-1 daca nodul nu are valoare)
+        :return: o valoare tip procent
+        """
+        if position == len(variables):
+            # daca nu mai exista noduri de procesat se returneaza 1
+            if self.monitor is not None:
+                self.monitor.step()
             return 1.0
 
-        # se ia primul nod din lista
-        first, *rest = nodes_list
+        # se ia nodul de pe pozitia curenta si randul din tabel corespunzator valorilor parintilor
+        first = variables[position]
+        row = self.cpt_rows[first][sum(assignment[parent] * stride for parent, stride
+                                       in zip(self.parent_indices[first], self.parent_strides[first]))]
 
-        if first in evidence:
-            # daca nodul este cunoscut, se calculeaza probabilitatea pentru aceasta
-            prob = self.probability(first, evidence)
-            # apoi se continua procesarea urmatoarelor variabile recursiv
-            return prob * self.enumerate_all(rest, evidence)
-        else:
-            # daca nodul nu este cunoscut, se calculeaza suma probabilitatilor
-            total = 0
-            possible_values = self.get_possible_values(first)
-            for value in possible_values:
-                # se aduna probabilitateaa pentru fiecare nod posibil
-                total += self.probability(first, {**evidence, first: value}) * self.enumerate_all(
-                    rest, {**evidence, first: value})
-            return total
+        if assignment[first] >= 0:
+            # daca nodul este cunoscut, se continua procesarea urmatoarelor variabile recursiv
+            return row[assignment[first]] * self._enumerate_all(variables, position + 1, assignment)
+
+        # daca nodul nu este cunoscut, se calculeaza suma probabilitatilor
+        total = 0
+        for value, prob in enumerate(row):
+            assignment[first] = value
+            total += prob * self._enumerate_all(variables, position + 1, assignment)
+        assignment[first] = -1
+        return total
+
+    def _enumerate_log(self, variables, position, assignment):
+        """
+        Varianta in spatiul logaritmic a enumerarii: produsele devin sume de logaritmi, iar sumele
+        se calculeaza cu log-sum-exp, astfel incat rezultatul nu ajunge la 0 pe retele adanci
+        :param variables: lista indicilor nodurilor
+        :param position: pozitia nodului curent in variables
+        :param assignment: indicii valorilor pentru fiecare nod (-1 daca nodul nu are valoare)
+        :return: logaritmul sumei (-inf pentru probabilitatea 0)
+        """
+        if position == len(variables):
+            if self.monitor is not None:
+                self.monitor.step()
+            return 0.0
+
+        first = variables[position]
+        row = self.log_cpt_rows[first][sum(assignment[parent] * stride for parent, stride
+                                           in zip(self.parent_indices[first], self.parent_strides[first]))]
+
+        if assignment[first] >= 0:
+            return row[assignment[first]] + self._enumerate_log(variables, position + 1, assignment)
+
+        terms = []
+        for value, log_prob in enumerate(row):
+            assignment[first] = value
+            terms.append(log_prob + self._enumerate_log(variables, position + 1, assignment))
+        assignment[first] = -1
+        return log_sum(terms)
+
+    def memo_plan(self, variables, assignment, log_space=False):
+        """
+        Functie care pregateste enumerarea memorata: pentru fiecare pozitie din lista nodurilor calculeaza
+        frontiera, adica nodurile cu valori deja fixate pe care le citesc tabelele nodurilor ramase.
+        Suma partiala de la o pozitie depinde doar de valorile frontierei, deci acestea formeaza cheia cache-ului.
+        :param variables: lista indicilor nodurilor, in ordine topologica
+        :param assignment: atribuirea de pornire (evidentele si valoarea nodului interogat)
+        :param log_space: True daca sumele partiale se calculeaza in spatiul logaritmic
+        :return: un tuplu (identificator, noduri, frontierele fiecarei pozitii, log_space)
+        """
+        observed = tuple(node for node, value in enumerate(assignment) if value >= 0)
+        key = (tuple(variables), observed, log_space)
+        plan = self.memo_plans.get(key)
+        if plan is None:
+            positions = {node: position for position, node in enumerate(variables)}
+            frontiers = [()] * (len(variables) + 1)
+            read = set()
+            for position in range(len(variables) - 1, -1, -1):
+                node = variables[position]
+                read.update(self.parent_indices[node])
+                read.add(node)
+                frontiers[position] = tuple(sorted(var for var in read if assignment[var] >= 0 or
+                                                   positions.get(var, position) < position))
+            plan = (self.next_memo_plan_id, tuple(variables), frontiers, log_space)
+            self.next_memo_plan_id += 1
+            self.memo_plans.put(key, plan)
+        return plan
+
+    def _enumerate_memo(self, plan, position, assignment):
+        """
+        Varianta memorata a enumerarii: sumele partiale se pastreaza intr-un cache LRU, cu cheia
+        (plan, pozitie, valorile frontierei), iar atribuirea este modificata pe loc. Parcurgerea foloseste
+        o stiva explicita in locul recursiei, deci adancimea retelei nu este limitata de limita de recursie.
+        :param plan: planul intors de memo_plan
+        :param position: pozitia nodului curent
+        :param assignment: indicii valorilor pentru fiecare nod (-1 daca nodul nu are valoare)
+        :return: o valoare tip procent (logaritmul ei pentru un plan in spatiul logaritmic)
+        """
+        plan_id, variables, frontiers, log_space = plan
+        rows = self.log_cpt_rows if log_space else self.cpt_rows
+        # cadrele pozitiilor deschise: [pozitie, cheie, nod, rand, nodul este neobservat, suma partiala]
+        stack = []
+        calls, branches, deepest = 0, 0, position
+        while True:
+            # coborare pana la o suma cunoscuta: capatul unei ramuri sau o suma partiala gasita in cache
+            while True:
+                calls += 1
+                if position == len(variables):
+                    branches += 1
+                    if self.monitor is not None:
+                        self.monitor.step()
+                    total = 0.0 if log_space else 1.0
+                    break
+                key = (plan_id, position, tuple([assignment[var] for var in frontiers[position]]))
+                total = self.memo_cache.get(key)
+                if total is not None:
+                    break
+                first = variables[position]
+                row = rows[first][sum(assignment[parent] * stride for parent, stride
+                                      in zip(self.parent_indices[first], self.parent_strides[first]))]
+                free = assignment[first] < 0
+                if free:
+                    # valorile nodului neobservat se parcurg pe rand, incepand cu prima
+                    assignment[first] = 0
+                stack.append([position, key, first, row, free, [] if log_space else 0.0])
+                position += 1
+            if position > deepest:
+                deepest = position
+
+            # urcare: suma gasita se combina cu cadrele deschise, pana la un nod cu valori neparcurse
+            while stack:
+                frame = stack[-1]
+                frame_position, key, first, row, free, partial = frame
+                value = assignment[first]
+                if not free:
+                    total = row[value] + total if log_space else row[value] * total
+                else:
+                    if log_space:
+                        partial.append(row[value] + total)
+                    else:
+                        frame[5] = partial + row[value] * total
+                    if value + 1 < len(row):
+                        assignment[first] = value + 1
+                        position = frame_position + 1
+                        break
+                    assignment[first] = -1
+                    total = log_sum(partial) if log_space else frame[5]
+                self.memo_cache.put(key, total)
+                stack.pop()
+            else:
+                if self.profiler is not None:
+                    self.profiler.record_enumeration(calls, branches, deepest)
+                return total
 
     def probability(self, node, evidence):
         """
@@ -98,84 +953,132 @@ class BayesianNetwork:
         :param: variabila pt care calc. probailitatea, valorile observate si reteaua B.
         :return: o valoare a probabilitatii
         """
-        node_data = self.network[node]
-        parents = node_data["parents"]
-
-        if not parents:
-            # daca nodul nu are parinti se folosesc direct cheile
-            return node_data["probabilities"][evidence[node]]
-
-        # daca nodul are parinti se folosesc valorile conditionate
-        parent_values = ",".join(evidence[parent] for parent in parents)
-        return node_data["probabilities"][parent_values][evidence[node]]
+        index = self.node_index[node]
+        key = tuple(self.value_index[parent][evidence[self.nodes[parent]]]
+                    for parent in self.parent_indices[index])
+        return float(self.cpts[index][key + (self.value_index[index][evidence[node]],)])
 
-    def p_e_query(self, evidence):
+    def p_e_query(self, evidence, algorithm="enumeration", log_space=False):
         """
         Functie care calculeaza probabilitatea evidentelor P(E=e) pe baza retelei bayesiene.
         :param evidence: nodurile observate
+        :param algorithm: "enumeration" (enumerare completa), "memoized", "variable_elimination" sau "junction_tree"
+        :param log_space: True pentru calcul in spatiul logaritmic (vezi si log_p_e_query)
         :return: probabilitatea evidentelor curente
         """
-        all_variables = list(self.network.keys())
-        return self.enumerate_all(all_variables, evidence)
+        if log_space:
+            return math.exp(self.log_p_e_query(evidence, algorithm))
+        return self.cached_p_e(evidence, algorithm, False)
 
-    def find_irrelevant_nodes(self, query_node, evidence):
+    def log_p_e_query(self, evidence, algorithm="enumeration"):
         """
-        Identifica nodurile irelevante pentru calcularea probabilitatii unui nod interogat,
-        avand in vedere evidentele
-        :param query_node: Nodul pentru care se face interogarea
-        :param evidence: Evidentele curente
-        :return: O lista de noduri irelevante
+        Functie care calculeaza logaritmul probabilitatii evidentelor, log P(E=e), in spatiul logaritmic;
+        ramane finit si atunci cand P(E=e) este prea mica pentru a fi reprezentata
+        :param evidence: nodurile observate
+        :param algorithm: algoritmul de inferenta (vezi p_e_query)
+        :return: log P(E=e) (-inf daca evidentele sunt imposibile)
         """
+        return self.cached_p_e(evidence, algorithm, True)
 
-        def is_active_path(current_node, target_node, visited, direction, evidence):
-            """
-            Verifica recursiv daca exista o cale activa intre nodul curent si cel tinta.
-            :param current_node: Nodul curent
-            :param target_node: Nodul tinta
-            :param visited: Nodurile deja vizitate pentru a evita cicluri
-            :param direction: Directia relatiei (ex. "parent", "child")
-            :param evidence: Nodurile observate care pot bloca calea
-            :return: True daca exista o cale activa
-            """
-            if current_node in visited:
-                return False
-            visited.add(current_node)
-
-
-            # Daca am ajuns la nodul tinta
-            if current_node == target_node:
-                return True
+    def cached_p_e(self, evidence, algorithm, log_space):
+        """
+        Functie care cauta P(E=e) (sau logaritmul ei) in cache-ul de rezultate, calculand-o daca lipseste
+        :param evidence: nodurile observate
+        :param algorithm: algoritmul de inferenta
+        :param log_space: True pentru log P(E=e)
+        :return: rezultatul
+        """
+        return self.cached_result("log_p_e" if log_space else "p_e", None, evidence,
+                                  lambda: self.compute_p_e(evidence, algorithm, log_space))
 
-            # Verifica parintii (cai de sus in jos)
-            if direction in ("child", "both"):
-                for parent in self.network[current_node]["parents"]:
-                    if parent not in evidence and is_active_path(parent, target_node, visited, "parent", evidence):
-                        return True
+    def compute_p_e(self, evidence, algorithm, log_space=False):
+        """
+        Functie care calculeaza P(E=e) cu algoritmul dat, fara cache-ul de rezultate
+        :param evidence: nodurile observate
+        :param algorithm: algoritmul de inferenta (vezi p_e_query)
+        :param log_space: True pentru calcul in spatiul logaritmic
+        :return: probabilitatea evidentelor (logaritmul ei daca log_space este True)
+        """
+        assignment = self.encode_evidence(evidence)
+        if algorithm == "variable_elimination":
+            return variable_elimination_p_e(self, assignment, self.prune_for_evidence(assignment), log_space=log_space)
+        if algorithm == "junction_tree":
+            tree = self.compiled_tree(log_space)
+            tree.set_assignment(assignment)
+            return tree.probability_of_evidence()
+        if algorithm == "memoized":
+            variables = self.prune_for_evidence(assignment)
+            if self.monitor is not None:
+                self.monitor.start(None)
+            return self._enumerate_memo(self.memo_plan(variables, assignment, log_space), 0, assignment)
+        if algorithm != "enumeration":
+            raise ValueError(f"Unknown inference algorithm: {algorithm}")
 
-            # Verifica copiii (cai de jos in sus)
-            if direction in ("parent", "both"):
-                for child, data in self.network.items():
-                    if current_node in data["parents"]:
-                        if current_node not in evidence:
-                            if is_active_path(child, target_node, visited, "child", evidence):
-                                return True
+        # doar stramosii evidentelor influenteaza P(E=e)
+        variables = self.prune_for_evidence(assignment)
+        self.check_enumeration_depth(variables)
+        if self.monitor is not None:
+            self.monitor.start(self.enumeration_size(variables, assignment))
+        if log_space:
+            return self._enumerate_log(variables, 0, assignment)
+        return self._enumerate_all(variables, 0, assignment)
 
-            return False
+    def mpe(self, evidence, log_space=False):
+        """
+        Functie care calculeaza explicatia cea mai probabila (MPE): atribuirea comuna cea mai probabila
+        a tuturor nodurilor neobservate, data fiind evidenta (vezi map_query)
+        :param evidence: nodurile observate
+        :param log_space: True pentru calcul in spatiul logaritmic
+        :return: un dictionar nod:valoare pentru nodurile neobservate si probabilitatea comuna P(x, e)
+                 (logaritmul ei daca log_space este True)
+        """
+        return self.map_query([node for node in self.nodes if node not in evidence], evidence, log_space)
 
-        # Nodurile relevante sunt cele conectate printr-o cale activa
-        relevant_nodes = set()
-        for node in self.network.keys():
-            if node == query_node or is_active_path(node, query_node, set(), "both", evidence):
-                relevant_nodes.add(node)
+    def map_query(self, nodes, evidence, log_space=False):
+        """
+        Functie care calculeaza atribuirea comuna cea mai probabila (MAP) a nodurilor date, data fiind evidenta,
+        prin eliminare max-produs cu traceback: celelalte noduri neobservate se sumeaza, iar nodurile date se
+        maximizeaza. Spre deosebire de alegerea valorii celei mai probabile a fiecarui nod separat, rezultatul
+        este o atribuire comuna, obtinuta dintr-o singura eliminare.
+        :param nodes: nodurile pentru care se cauta atribuirea; ca in enumeration_ask, evidentele lor nu se folosesc
+        :param evidence: nodurile observate
+        :param log_space: True pentru calcul in spatiul logaritmic
+        :return: un dictionar nod:valoare si probabilitatea comuna P(x, e) (logaritmul ei daca log_space este True)
+        """
+        evidence = {node: value for node, value in evidence.items() if node not in nodes}
+        assignment, probability = self.cached_result("log_map" if log_space else "map", sorted(nodes), evidence,
+                                                     lambda: self.compute_map(nodes, evidence, log_space))
+        return {node: assignment[node] for node in nodes}, probability
 
-        # Adauga nodurile din evidente la cele relevante
-        relevant_nodes.update(evidence.keys())
+    def compute_map(self, nodes, evidence, log_space=False):
+        """
+        Functie care calculeaza atribuirea MAP, fara cache-ul de rezultate
+        :param nodes: nodurile pentru care se cauta atribuirea
+        :param evidence: nodurile observate, fara nodurile cautate
+        :param log_space: True pentru calcul in spatiul logaritmic
+        :return: o lista [dictionar nod:valoare, probabilitatea comuna], serializabila JSON pentru cache
+        """
+        assignment = self.encode_evidence(evidence)
+        maximized = [self.node_index[node] for node in nodes]
+        values, probability = max_product_assignment(self, assignment, self.prune_for_map(maximized, assignment),
+                                                     maximized, log_space=log_space)
+        if probability == (-math.inf if log_space else 0):
+            raise ValueError("Evidence has zero probability")
+        return [{self.nodes[node]: self.domains[node][value] for node, value in values.items()}, probability]
 
-        # Nodurile irelevante sunt cele care nu sunt in nodurile relevante
-        all_nodes = set(self.network.keys())
-        irrelevant_nodes = list(all_nodes - relevant_nodes)
+    def find_irrelevant_nodes(self, query_node, evidence):
+        """
+        Identifica nodurile irelevante pentru calcularea probabilitatii unui nod interogat,
+        avand in vedere evidentele: nodurile d-separate de interogare si nodurile sterpe,
+        ale caror tabele nu influenteaza rezultatul
+        :param query_node: Nodul pentru care se face interogarea
+        :param evidence: Evidentele curente
+        :return: O lista de noduri irelevante
+        """
+        _, irrelevant_nodes = self.relevant_nodes(query_node, evidence)
 
-        return irrelevant_nodes
+        # Nodurile din evidente nu sunt raportate ca irelevante
+        return [node for node in self.nodes if node in irrelevant_nodes and node not in evidence]
 
 
 #algoritmul lui Kahn care face sortarea topologica
@@ -188,12 +1091,12 @@ def kahn_topological_sort(graph):
         for neighbor in neighbors:
             in_degree[neighbor] += 1
 
-    #incep cu nodurile care nu au muchii de intrare
-    s = [node for node, degree in in_degree.items() if degree == 0]
+    #incep cu nodurile care nu au muchii de intrare (coada deque, cu extragere in O(1))
+    s = deque(node for node, degree in in_degree.items() if degree == 0)
     l = []
 
     while s:
-        n = s.pop(0)
+        n = s.popleft()
         l.append(n)
         for m in graph.get(n, []):
             in_degree[m] -= 1
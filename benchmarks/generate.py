@@ -0,0 +1,105 @@
+import argparse
+import json
+import random
+from itertools import product
+
+"""
+Modulul generate construieste retele bayesiene sintetice in aceeasi schema JSON ca test1_network.json si
+test2_network.json, pentru masurarea performantei: lanturi (ca test2), arbori, poliarbori si grafuri aciclice
+aleatoare cu un numar limitat de parinti. Tabelele de probabilitate au randuri aleatoare cu suma 1.
+"""
+TOPOLOGIES = ("chain", "tree", "polytree", "random_dag")
+
+
+def parent_lists(topology, n_nodes, rng, max_in_degree=3, branching=2):
+    """
+    Functie care alege parintii fiecarui nod; nodurile sunt numerotate astfel incat parintii
+    au mereu indici mai mici (cu exceptia poliarborelui, unde directia muchiilor este aleatoare)
+    :param topology: "chain", "tree", "polytree" sau "random_dag"
+    :param n_nodes: numarul de noduri
+    :param rng: generatorul de numere aleatoare
+    :param max_in_degree: numarul maxim de parinti (pentru "random_dag")
+    :param branching: numarul de copii ai fiecarui nod (pentru "tree")
+    :return: o lista cu lista indicilor parintilor fiecarui nod
+    """
+    parents = [[] for _ in range(n_nodes)]
+    if topology == "chain":
+        for node in range(1, n_nodes):
+            parents[node].append(node - 1)
+    elif topology == "tree":
+        for node in range(1, n_nodes):
+            parents[node].append((node - 1) // branching)
+    elif topology == "polytree":
+        # un arbore neorientat aleator, cu fiecare muchie orientata la intamplare: graful ramane fara cicluri
+        # neorientate, deci un nod poate avea mai multi parinti fara ca parintii sa aiba un stramos comun
+        for node in range(1, n_nodes):
+            other = rng.randrange(node)
+            if rng.random() < 0.5:
+                parents[node].append(other)
+            else:
+                parents[other].append(node)
+    elif topology == "random_dag":
+        for node in range(1, n_nodes):
+            parents[node] = rng.sample(range(node), min(node, rng.randint(0, max_in_degree)))
+    else:
+        raise ValueError(f"Unknown topology: {topology}")
+    return parents
+
+
+def random_row(values, rng):
+    """
+    Functie care genereaza o distributie aleatoare peste valorile unui nod
+    :param values: valorile nodului
+    :param rng: generatorul de numere aleatoare
+    :return: un dictionar valoare:probabilitate
+    """
+    weights = [rng.random() + 0.01 for _ in values]
+    total = sum(weights)
+    return {value: weight / total for value, weight in zip(values, weights)}
+
+
+def generate_network(topology, n_nodes, domain_size=2, max_in_degree=3, branching=2, seed=0):
+    """
+    Functie care genereaza o retea sintetica
+    :param topology: "chain", "tree", "polytree" sau "random_dag"
+    :param n_nodes: numarul de noduri
+    :param domain_size: numarul de valori al fiecarui nod, sau o pereche (minim, maxim) pentru marimi aleatoare
+    :param max_in_degree: numarul maxim de parinti (pentru "random_dag")
+    :param branching: numarul de copii ai fiecarui nod (pentru "tree")
+    :param seed: samanta generatorului, pentru retele reproductibile
+    :return: un dictionar in schema JSON a retelelor ({"nodes": {...}})
+    """
+    rng = random.Random(seed)
+    names = [f"X{i}" for i in range(n_nodes)]
+    sizes = [domain_size] * n_nodes if isinstance(domain_size, int) else \
+        [rng.randint(*domain_size) for _ in range(n_nodes)]
+    domains = [[f"v{j}" for j in range(size)] for size in sizes]
+
+    nodes = {}
+    for node, node_parents in enumerate(parent_lists(topology, n_nodes, rng, max_in_degree, branching)):
+        if not node_parents:
+            probabilities = random_row(domains[node], rng)
+        else:
+            probabilities = {",".join(combination): random_row(domains[node], rng)
+                             for combination in product(*(domains[parent] for parent in node_parents))}
+        nodes[names[node]] = {"parents": [names[parent] for parent in node_parents],
+                              "probabilities": probabilities}
+    return {"nodes": nodes}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic Bayesian network in the JSON schema.")
+    parser.add_argument("topology", choices=TOPOLOGIES)
+    parser.add_argument("n_nodes", type=int)
+    parser.add_argument("output", help="JSON file to write")
+    parser.add_argument("--domain-size", type=int, nargs="+", default=[2],
+                        help="number of values per node, or a min and max for random sizes")
+    parser.add_argument("--max-in-degree", type=int, default=3, help="maximum number of parents (random_dag)")
+    parser.add_argument("--branching", type=int, default=2, help="children per node (tree)")
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    domain_size = arguments.domain_size[0] if len(arguments.domain_size) == 1 else tuple(arguments.domain_size[:2])
+    with open(arguments.output, "w") as file:
+        json.dump(generate_network(arguments.topology, arguments.n_nodes, domain_size, arguments.max_in_degree,
+                                   arguments.branching, arguments.seed), file, indent=4)
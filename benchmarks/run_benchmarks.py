@@ -0,0 +1,302 @@
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bayesian_network import BayesianNetwork
+from generate import TOPOLOGIES, generate_network
+
+"""
+Modulul run_benchmarks masoara cum scaleaza inferenta: pentru fiecare topologie, marime a retelei,
+densitate a evidentelor si algoritm masoara timpul lui enumeration_ask, p_e_query si find_irrelevant_nodes
+(si timpul de incarcare si compilare), precum si memoria maxima alocata. Rezultatele se scriu intr-un
+fisier JSON, se afiseaza ca o curba timp / marime si se compara cu un fisier de referinta (baseline)
+pentru a detecta regresiile.
+"""
+OPERATIONS = ("query", "p_e", "irrelevant")
+
+
+def sample_evidence(network, density, rng):
+    """
+    Functie care alege evidente consistente: se esantioneaza o stare completa a retelei (in ordine topologica)
+    si se pastreaza valorile unei fractiuni din noduri, deci P(E=e) > 0
+    :param network: reteaua bayesiana
+    :param density: fractiunea nodurilor observate
+    :param rng: generatorul de numere aleatoare
+    :return: un dictionar de perechi nod:valoare
+    """
+    state = []
+    for node in range(len(network.nodes)):
+        row = network.cpts[node][tuple(state[parent] for parent in network.parent_indices[node])]
+        state.append(rng.choices(range(len(row)), weights=row.tolist())[0])
+    observed = rng.sample(range(len(network.nodes)), round(density * len(network.nodes)))
+    return {network.nodes[node]: network.domains[node][state[node]] for node in observed}
+
+
+def make_queries(network, density, n_queries, seed):
+    """
+    Functie care genereaza interogarile unei masuratori: un nod interogat neobservat si evidentele
+    :return: o lista de perechi (nod interogat, evidente)
+    """
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n_queries):
+        evidence = sample_evidence(network, density, rng)
+        hidden = [node for node in network.nodes if node not in evidence] or network.nodes
+        queries.append((rng.choice(hidden), evidence))
+    return queries
+
+
+def run_operation(network, operation, algorithm, query_node, evidence):
+    """
+    Functie care executa o operatie masurata
+    """
+    if operation == "query":
+        network.set_evidence({node: value for node, value in evidence.items() if node != query_node})
+        network.enumeration_ask(query_node, algorithm=algorithm)
+    elif operation == "p_e":
+        network.p_e_query(evidence, algorithm=algorithm)
+    else:
+        network.find_irrelevant_nodes(query_node, evidence)
+
+
+def enumeration_branches(network, operation, queries):
+    """
+    Functie care estimeaza costul enumerarii (numarul maxim de ramuri pe interogare), fara a o efectua
+    :return: numarul de ramuri al celei mai scumpe interogari
+    """
+    branches = 0
+    for query_node, evidence in queries:
+        if operation == "query":
+            query_index, assignment = network.query_assignment(query_node, evidence)
+            variables = network.prune(query_index, assignment)
+        else:
+            assignment = network.encode_evidence(evidence)
+            variables = network.prune_for_evidence(assignment)
+        branches = max(branches, network.enumeration_size(variables, assignment))
+    return branches
+
+
+def timing(times):
+    """
+    Functie care rezuma duratele repetarilor unei masuratori
+    :param times: duratele, in secunde
+    :return: un dictionar cu mediana, media, minimul si numarul de repetari
+    """
+    return {"median_s": statistics.median(times), "mean_s": statistics.fmean(times), "min_s": min(times),
+            "repeats": len(times)}
+
+
+def measure(network, operation, algorithm, queries, repeats=5):
+    """
+    Functie care masoara o operatie pe toate interogarile: intai timpul (fara tracemalloc, care incetineste
+    executia), apoi, intr-o a doua trecere, memoria maxima alocata. Setul de interogari se ruleaza de repeats ori,
+    iar durata unei repetari este timpul mediu pe interogare, deci repetarile sunt comparabile intre ele.
+    :return: un dictionar cu timpii pe interogare (mediana, media, minimul repetarilor, in secunde)
+             si memoria maxima (in octeti)
+    """
+    times = []
+    for _ in range(repeats):
+        # sumele partiale ale enumerarii memorate nu se pastreaza intre repetari
+        network.memo_cache.clear()
+        started = time.perf_counter()
+        for query_node, evidence in queries:
+            run_operation(network, operation, algorithm, query_node, evidence)
+        times.append((time.perf_counter() - started) / len(queries))
+
+    tracemalloc.start()
+    for query_node, evidence in queries:
+        run_operation(network, operation, algorithm, query_node, evidence)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {**timing(times), "peak_bytes": peak}
+
+
+def run_benchmarks(topologies, sizes, densities, algorithms, n_queries=5, domain_size=2, time_limit=2.0, seed=0,
+                   max_cost=10 ** 7, max_branches=10 ** 5, repeats=5, log=print):
+    """
+    Functie care ruleaza toate masuratorile. Pentru fiecare topologie si algoritm marimile cresc pana cand
+    o operatie depaseste time_limit, dupa care marimile mai mari se sar; masuratorile al caror cost estimat
+    depaseste max_branches (ramuri ale enumerarii) sau max_cost (intrari in tabelele eliminarii) nu se pornesc deloc
+    :return: o lista de rezultate, cate unul pentru fiecare (topologie, marime, densitate, algoritm, operatie)
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for topology in topologies:
+            too_slow = set()
+            for n_nodes in sizes:
+                path = os.path.join(directory, f"{topology}_{n_nodes}.json")
+                with open(path, "w") as file:
+                    json.dump(generate_network(topology, n_nodes, domain_size, seed=seed), file)
+
+                setup = {"load": [], "compile": []}
+                for _ in range(repeats):
+                    started = time.perf_counter()
+                    network = BayesianNetwork(path)
+                    setup["load"].append(time.perf_counter() - started)
+                # eliminarea variabilelor si arborele de clici au costul dat de latimea arborelui retelei
+                tractable = network.exact_cost() <= max_cost
+                if tractable:
+                    for _ in range(repeats):
+                        started = time.perf_counter()
+                        network.compile()
+                        setup["compile"].append(time.perf_counter() - started)
+                for operation, times in setup.items():
+                    if times:
+                        results.append({"topology": topology, "n_nodes": n_nodes, "density": None,
+                                        "algorithm": None, "operation": operation, **timing(times),
+                                        "peak_bytes": None})
+
+                for density in densities:
+                    queries = make_queries(network, density, n_queries, seed)
+                    for algorithm in algorithms:
+                        for operation in OPERATIONS:
+                            # nodurile irelevante nu depind de algoritm, deci se masoara o singura data
+                            if operation == "irrelevant" and algorithm != algorithms[0]:
+                                continue
+                            if (algorithm, operation) in too_slow:
+                                continue
+                            if operation != "irrelevant" and (
+                                    algorithm in ("enumeration", "memoized") and
+                                    enumeration_branches(network, operation, queries) > max_branches or
+                                    algorithm in ("variable_elimination", "junction_tree") and not tractable):
+                                log(f"{topology:>10} n={n_nodes:<5} density={density:<4} {algorithm:>20} "
+                                    f"{operation:>10}: skipped (estimated cost too high)")
+                                continue
+                            result = measure(network, operation, algorithm, queries, repeats)
+                            result.update(topology=topology, n_nodes=n_nodes, density=density,
+                                          algorithm=None if operation == "irrelevant" else algorithm,
+                                          operation=operation)
+                            results.append(result)
+                            log(f"{topology:>10} n={n_nodes:<5} density={density:<4} {algorithm or '-':>20} "
+                                f"{operation:>10}: {result['median_s'] * 1000:10.3f} ms, "
+                                f"peak {result['peak_bytes'] / 1024:10.1f} KiB")
+                            if result["min_s"] > time_limit:
+                                too_slow.add((algorithm, operation))
+    return results
+
+
+def result_key(result):
+    """
+    Functie care construieste cheia unui rezultat, folosita la compararea cu baseline-ul
+    """
+    return (result["topology"], result["n_nodes"], result["density"], result["algorithm"], result["operation"])
+
+
+def find_regressions(results, baseline, tolerance=0.25, noise_floor=1e-3):
+    """
+    Functie care compara rezultatele cu baseline-ul; se compara minimul repetarilor, cel mai putin
+    afectat de incarcarea masinii
+    :param results: rezultatele curente
+    :param baseline: rezultatele de referinta
+    :param tolerance: incetinirea relativa permisa (0.25 = 25%)
+    :param noise_floor: diferenta absoluta, in secunde, sub care o incetinire este considerata zgomot
+    :return: o lista de perechi (rezultat curent, rezultat de referinta) mai lente decat permite toleranta
+    """
+    reference = {result_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = reference.get(result_key(result))
+        if old is None:
+            continue
+        if result["min_s"] > old["min_s"] * (1 + tolerance) and result["min_s"] - old["min_s"] > noise_floor:
+            regressions.append((result, old))
+    return regressions
+
+
+def format_curves(results):
+    """
+    Functie care formateaza curbele timp / marime: pentru fiecare serie (topologie, densitate, algoritm, operatie)
+    cate un rand pentru fiecare marime, cu o bara proportionala cu logaritmul timpului
+    :return: un sir de caractere
+    """
+    series = {}
+    for result in results:
+        key = (result["topology"], result["density"], result["algorithm"], result["operation"])
+        series.setdefault(key, []).append((result["n_nodes"], result["median_s"]))
+
+    lines = []
+    for (topology, density, algorithm, operation), points in series.items():
+        lines.append(f"{topology}, {operation}" + (f", {algorithm}" if algorithm else "") +
+                     (f", evidence density {density}" if density is not None else ""))
+        for n_nodes, seconds in points:
+            # o diviziune a barei inseamna de doua ori mai mult timp; bara porneste de la 1 microsecunda
+            bar = "#" * max(1, round(math.log2(max(seconds, 1e-6) / 1e-6)))
+            lines.append(f"  {n_nodes:>6} nodes {seconds * 1000:12.3f} ms  {bar}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark inference on synthetic Bayesian networks.")
+    parser.add_argument("--topologies", nargs="+", choices=TOPOLOGIES, default=list(TOPOLOGIES))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 10, 20, 40, 80, 160])
+    parser.add_argument("--densities", type=float, nargs="+", default=[0.1, 0.3],
+                        help="fractions of observed nodes")
+    parser.add_argument("--algorithms", nargs="+", default=["junction_tree", "variable_elimination", "enumeration"],
+                        choices=["enumeration", "memoized", "variable_elimination", "junction_tree"])
+    parser.add_argument("--queries", type=int, default=5, help="queries per measurement")
+    parser.add_argument("--repeats", type=int, default=5,
+                        help="times each measurement (including load and compile) is repeated")
+    parser.add_argument("--domain-size", type=int, default=2)
+    parser.add_argument("--time-limit", type=float, default=2.0,
+                        help="seconds per query above which larger sizes are skipped for that algorithm")
+    parser.add_argument("--max-cost", type=int, default=10 ** 7,
+                        help="estimated elimination cost (table entries) above which exact runs are skipped")
+    parser.add_argument("--max-branches", type=int, default=10 ** 5,
+                        help="estimated enumeration branches per query above which enumeration runs are skipped")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quick", action="store_true", help="small sizes only, for a fast check")
+    parser.add_argument("--output", default="benchmark_results.json", help="machine-readable results file")
+    parser.add_argument("--baseline", default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                           "baseline.json"),
+                        help="stored results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    arguments = parser.parse_args(argv)
+
+    sizes = [size for size in arguments.sizes if size <= 20] if arguments.quick else arguments.sizes
+    results = run_benchmarks(arguments.topologies, sizes, arguments.densities, arguments.algorithms,
+                             arguments.queries, arguments.domain_size, arguments.time_limit, arguments.seed,
+                             arguments.max_cost, arguments.max_branches, arguments.repeats)
+    report = {"environment": {"python": platform.python_version(), "numpy": np.__version__,
+                              "platform": platform.platform(), "processor": platform.processor()},
+              "config": {key: value for key, value in vars(arguments).items()
+                         if key not in ("output", "baseline", "save_baseline")},
+              "results": results}
+    with open(arguments.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print()
+    print(format_curves(results))
+    print(f"\nResults written to {arguments.output}")
+
+    if arguments.save_baseline:
+        with open(arguments.baseline, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline saved to {arguments.baseline}")
+        return 0
+    if not os.path.exists(arguments.baseline):
+        print("No baseline to compare against (use --save-baseline to store one)")
+        return 0
+
+    with open(arguments.baseline) as file:
+        baseline = json.load(file)["results"]
+    regressions = find_regressions(results, baseline, arguments.tolerance)
+    for result, old in regressions:
+        print(f"REGRESSION {result['topology']} n={result['n_nodes']} density={result['density']} "
+              f"{result['algorithm'] or '-'} {result['operation']}: "
+              f"{old['min_s'] * 1000:.3f} ms -> {result['min_s'] * 1000:.3f} ms")
+    print(f"{len(regressions)} regressions against {arguments.baseline} (tolerance {arguments.tolerance:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
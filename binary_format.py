@@ -0,0 +1,122 @@
+import argparse
+import hashlib
+import json
+import struct
+import numpy as np
+
+"""
+Modulul binary_format scrie si citeste reteaua bayesiana compilata intr-un format binar compact:
+un antet mic (JSON) cu nodurile, domeniile si parintii, urmat de tabelele de probabilitate
+scrise unul dupa altul ca tablouri float64 sau float32 contigue.
+La citire tabelele nu se copiaza in memorie, ci se mapeaza din fisier cu numpy.memmap (doar citire),
+astfel incat mai multe procese care deschid acelasi fisier folosesc aceeasi copie.
+
+Structura fisierului:
+    MAGIC (4 octeti) | versiunea (uint32) | lungimea antetului (uint32) | antetul JSON |
+    completare pana la un multiplu de ALIGNMENT | tabelele, in ordinea nodurilor
+"""
+BINARY_EXTENSION = ".bnet"
+MAGIC = b"BNET"
+VERSION = 1
+ALIGNMENT = 64
+PREAMBLE = struct.Struct("<4sII")
+DTYPES = {"float64": "<f8", "float32": "<f4"}
+
+
+def data_offset(header_size):
+    """
+    Functie care calculeaza pozitia tabelelor in fisier, aliniata la ALIGNMENT octeti
+    :param header_size: lungimea antetului JSON, in octeti
+    :return: pozitia primului tabel
+    """
+    end = PREAMBLE.size + header_size
+    return (end + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def save_network(network, filename, dtype="float64"):
+    """
+    Functie care exporta o retea incarcata in formatul binar
+    :param network: reteaua bayesiana (BayesianNetwork)
+    :param filename: numele fisierului binar
+    :param dtype: "float64" sau "float32" (tabele de doua ori mai mici, cu precizie redusa)
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported dtype: {dtype}")
+    cpts = [np.ascontiguousarray(cpt, dtype=DTYPES[dtype]) for cpt in network.cpts]
+    header = json.dumps({
+        "dtype": dtype,
+        "nodes": network.nodes,
+        "domains": network.domains,
+        "parents": [list(parents) for parents in network.parent_indices],
+        # amprenta se calculeaza pe valorile scrise, astfel incat cache-ul de rezultate ramane corect si pentru float32
+        "content_hash": network_hash(network.nodes, network.domains, network.parent_indices, cpts),
+    }, separators=(",", ":")).encode("utf-8")
+
+    with open(filename, "wb") as file:
+        file.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        file.write(header)
+        file.write(b"\0" * (data_offset(len(header)) - PREAMBLE.size - len(header)))
+        for cpt in cpts:
+            file.write(cpt.tobytes())
+
+
+def load_network(filename):
+    """
+    Functie care citeste antetul unui fisier binar si mapeaza tabelele din el
+    :param filename: numele fisierului binar
+    :return: antetul (un dictionar) si lista tabelelor, vederi numpy doar pentru citire ale fisierului
+    """
+    with open(filename, "rb") as file:
+        magic, version, header_size = PREAMBLE.unpack(file.read(PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"'{filename}' is not a binary network file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported binary network version: {version}")
+        header = json.loads(file.read(header_size).decode("utf-8"))
+
+    domains, parents = header["domains"], header["parents"]
+    for node, node_parents in enumerate(parents):
+        # nodurile sunt scrise in ordine topologica, deci parintii au indici mai mici
+        if any(not 0 <= parent < node for parent in node_parents):
+            raise ValueError(f"Node '{header['nodes'][node]}' has invalid parents in '{filename}'")
+    shapes = [tuple(len(domains[p]) for p in node_parents) + (len(domains[node]),)
+              for node, node_parents in enumerate(parents)]
+    sizes = [int(np.prod(shape)) for shape in shapes]
+
+    data = np.memmap(filename, dtype=DTYPES[header["dtype"]], mode="r",
+                     offset=data_offset(header_size), shape=(sum(sizes),))
+    cpts = []
+    start = 0
+    for shape, size in zip(shapes, sizes):
+        cpts.append(data[start:start + size].reshape(shape))
+        start += size
+    return header, cpts
+
+
+def network_hash(nodes, domains, parent_indices, cpts):
+    """
+    Functie care calculeaza amprenta continutului retelei (structura, domenii si tabele), folosita drept
+    cheie de cache: o retea modificata are alta amprenta, deci rezultatele vechi nu mai sunt gasite
+    :param nodes: numele nodurilor, in ordine topologica
+    :param domains: domeniile nodurilor
+    :param parent_indices: indicii parintilor fiecarui nod
+    :param cpts: tabelele de probabilitate
+    :return: un sir hexazecimal
+    """
+    digest = hashlib.sha256()
+    for node, name in enumerate(nodes):
+        digest.update(json.dumps([name, [nodes[p] for p in parent_indices[node]], domains[node]]).encode("utf-8"))
+        digest.update(np.ascontiguousarray(cpts[node], dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+if __name__ == "__main__":
+    from bayesian_network import BayesianNetwork
+
+    parser = argparse.ArgumentParser(description="Export a Bayesian network to the compact binary format.")
+    parser.add_argument("source", help="network file (JSON or binary)")
+    parser.add_argument("target", help=f"binary network file (usually *{BINARY_EXTENSION})")
+    parser.add_argument("--dtype", choices=sorted(DTYPES), default="float64",
+                        help="precision of the stored probability tables")
+    arguments = parser.parse_args()
+    save_network(BayesianNetwork(arguments.source), arguments.target, arguments.dtype)
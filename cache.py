@@ -0,0 +1,170 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+"""
+Clasa LRUCache implementeaza un cache de marime limitata care elimina
+intrarea folosita cel mai de demult (least recently used)
+"""
+class LRUCache:
+    def __init__(self, maxsize=100000):
+        """
+        Constructorul clasei LRUCache
+        :param maxsize: numarul maxim de intrari pastrate
+        """
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """
+        Functie care cauta o valoare in cache si o marcheaza ca folosita recent
+        :param key: cheia cautata
+        :param default: valoarea returnata daca cheia lipseste
+        :return: valoarea gasita sau default
+        """
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Functie care adauga o valoare in cache, eliminand cea mai veche intrare daca s-a atins marimea maxima
+        :param key: cheia
+        :param value: valoarea
+        """
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Functie care goleste cache-ul si reseteaza contoarele
+        """
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def stats(self):
+        """
+        Functie care returneaza statisticile cache-ului
+        :return: un dictionar cu numarul de intrari, de gasiri si de ratari
+        """
+        return {"size": len(self.entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+"""
+Clasa ResultCache pastreaza rezultatele interogarilor: un nivel in memorie (LRU)
+si, optional, un nivel pe disc (SQLite) care se pastreaza intre sesiuni
+"""
+class ResultCache:
+    def __init__(self, maxsize=10000, path=None, disk_maxsize=100000):
+        """
+        Constructorul clasei ResultCache
+        :param maxsize: numarul maxim de rezultate pastrate in memorie
+        :param path: calea fisierului SQLite; daca lipseste, rezultatele se pastreaza doar in memorie
+        :param disk_maxsize: numarul maxim de rezultate pastrate pe disc; peste el se sterg cele mai vechi
+        """
+        self.memory = LRUCache(maxsize)
+        self.path = path
+        self.disk_maxsize = disk_maxsize
+        self.lock = threading.Lock()
+        self.disk_hits = 0
+        self.disk_size = 0
+        self.connection = None
+        if path is not None:
+            # conexiunea este folosita si de firul pe care interfata grafica ruleaza inferenta
+            self.connection = sqlite3.connect(path, check_same_thread=False)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self.connection.commit()
+            self.disk_size = self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    @staticmethod
+    def make_key(network_hash, kind, query, evidence):
+        """
+        Functie care construieste cheia canonica a unei interogari
+        :param network_hash: amprenta continutului retelei
+        :param kind: tipul interogarii (de ex. "query" sau "p_e")
+        :param query: nodul interogat (None pentru P(E=e))
+        :param evidence: un dictionar de perechi nod:valoare
+        :return: un sir hexazecimal
+        """
+        canonical = json.dumps([network_hash, kind, query, sorted(evidence.items())], separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Functie care cauta un rezultat, intai in memorie si apoi pe disc
+        :param key: cheia interogarii
+        :return: rezultatul sau None daca lipseste
+        """
+        with self.lock:
+            value = self.memory.get(key)
+            if value is not None or self.connection is None:
+                return value
+            row = self.connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value = json.loads(row[0])
+            self.disk_hits += 1
+            self.memory.put(key, value)
+            return value
+
+    def put(self, key, value):
+        """
+        Functie care pastreaza un rezultat (serializabil JSON) in memorie si pe disc
+        :param key: cheia interogarii
+        :param value: rezultatul
+        """
+        with self.lock:
+            self.memory.put(key, value)
+            if self.connection is not None:
+                cursor = self.connection.execute("INSERT OR IGNORE INTO results (key, value) VALUES (?, ?)",
+                                                 (key, json.dumps(value)))
+                self.disk_size += cursor.rowcount
+                if self.disk_size > self.disk_maxsize:
+                    # randurile noi primesc rowid-uri crescatoare, deci cele mai mici sunt cele mai vechi
+                    self.connection.execute("DELETE FROM results WHERE rowid IN "
+                                            "(SELECT rowid FROM results ORDER BY rowid LIMIT ?)",
+                                            (self.disk_size - self.disk_maxsize,))
+                    self.disk_size = self.disk_maxsize
+                self.connection.commit()
+
+    def clear(self):
+        """
+        Functie care sterge toate rezultatele, din memorie si de pe disc
+        """
+        with self.lock:
+            self.memory.clear()
+            if self.connection is not None:
+                self.connection.execute("DELETE FROM results")
+                self.connection.commit()
+                self.disk_size = 0
+
+    def stats(self):
+        """
+        Functie care returneaza statisticile cache-ului
+        :return: statisticile nivelului din memorie, numarul de rezultate gasite pe disc si numarul celor pastrate pe disc
+        """
+        return {**self.memory.stats(), "disk_hits": self.disk_hits, "disk_size": self.disk_size}
+
+    def close(self):
+        """
+        Functie care inchide fisierul de pe disc
+        """
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
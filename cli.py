@@ -0,0 +1,228 @@
+import argparse
+import json
+import math
+import sys
+import time
+from itertools import islice
+import numpy as np
+import parallel_inference
+from bayesian_network import BayesianNetwork
+from parallel_inference import ParallelInference
+
+"""
+Modulul cli este punctul de intrare fara interfata grafica: incarca reteaua o singura data si raspunde
+interogarilor primite ca linii JSON (de la stdin sau dintr-un fisier), scriind cate o linie JSON
+pentru fiecare raspuns, in ordinea interogarilor. Exemple de interogari:
+    {"query": "S3", "evidence": {"S1": "B2"}}     distributia nodului S3
+    {"evidence": {"S1": "B2"}}                    probabilitatea evidentelor P(E=e)
+Campul optional "id" este copiat in raspuns. Liniile se citesc si se scriu in blocuri de marime limitata,
+iar la final se afiseaza (la stderr) numarul de interogari pe secunda si latentele p50/p99.
+"""
+def request_fields(request):
+    """
+    Functie care citeste si verifica tipurile campurilor unei interogari (folosita si de server)
+    :param request: interogarea, un dictionar cu "query" (optional) si "evidence" (optional)
+    :return: nodul interogat (None daca lipseste) si dictionarul de evidente
+    """
+    evidence = request.get("evidence", {})
+    if not isinstance(evidence, dict):
+        raise ValueError("'evidence' must be an object")
+    if not all(isinstance(value, str) for value in evidence.values()):
+        # cheile unui obiect JSON sunt mereu siruri, deci se verifica doar valorile
+        raise ValueError("Evidence values must be strings")
+    query = request.get("query")
+    if query is not None and not isinstance(query, str):
+        raise ValueError("'query' must be a string")
+    return query, evidence
+
+
+def p_e_fields(network, evidence, algorithm, log_space):
+    """
+    Functie care calculeaza probabilitatea evidentelor pentru un raspuns JSON (folosita si de server)
+    :param network: reteaua bayesiana
+    :param evidence: un dictionar de perechi nod:valoare
+    :param algorithm: algoritmul de inferenta exacta
+    :param log_space: True pentru calcul in spatiul logaritmic
+    :return: un dictionar cu "p_e" si, in spatiul logaritmic, "log_p_e" (null pentru evidente imposibile,
+             deoarece -inf nu este JSON valid)
+    """
+    if not log_space:
+        return {"p_e": network.p_e_query(evidence, algorithm=algorithm)}
+    log_p_e = network.log_p_e_query(evidence, algorithm=algorithm)
+    if log_p_e == -math.inf:
+        return {"p_e": 0.0, "log_p_e": None}
+    return {"p_e": math.exp(log_p_e), "log_p_e": log_p_e}
+
+
+def answer(network, request, algorithm, log_space):
+    """
+    Functie care raspunde unei interogari
+    :param network: reteaua bayesiana
+    :param request: interogarea, un dictionar cu "query" (optional), "evidence" si "id" (optional)
+    :param algorithm: algoritmul de inferenta exacta
+    :param log_space: True pentru calcul in spatiul logaritmic
+    :return: raspunsul (un dictionar) si durata calculului, in secunde
+    """
+    started = time.perf_counter()
+    response = {"id": request["id"]} if "id" in request else {}
+    try:
+        query, evidence = request_fields(request)
+        if query is None:
+            response.update(p_e_fields(network, evidence, algorithm, log_space))
+        else:
+            network.set_evidence(evidence)
+            response.update(query=query, posterior=network.enumeration_ask(query, algorithm=algorithm,
+                                                                           log_space=log_space))
+    except KeyError as e:
+        response["error"] = f"Unknown node or value: {e}"
+    except ValueError as e:
+        response["error"] = str(e)
+    return response, time.perf_counter() - started
+
+
+def answer_in_worker(task):
+    """
+    Functie executata in procese: raspunde unei interogari cu reteaua procesului
+    :param task: un tuplu (interogare, algoritm, log_space)
+    :return: raspunsul si durata calculului
+    """
+    request, algorithm, log_space = task
+    return answer(parallel_inference.worker_network, request, algorithm, log_space)
+
+
+def reject_constant(name):
+    """
+    Functie apelata de json.loads pentru constantele NaN, Infinity si -Infinity
+    :param name: constanta citita
+    """
+    raise ValueError(f"{name} is not allowed")
+
+
+def parse_line(line):
+    """
+    Functie care citeste o interogare dintr-o linie JSON
+    :param line: linia citita
+    :return: interogarea sau un mesaj de eroare
+    """
+    try:
+        # NaN si Infinity nu sunt JSON valid si nu ar putea fi copiate in raspuns (de ex. in "id")
+        request = json.loads(line, parse_constant=reject_constant)
+    except ValueError as e:
+        return None, f"Invalid JSON: {e}"
+    if not isinstance(request, dict):
+        return None, "Each line must be a JSON object"
+    return request, None
+
+
+def run(network, lines, output, algorithm="junction_tree", log_space=False, workers=1, chunk_size=1000):
+    """
+    Functie care raspunde interogarilor citite din lines, bloc cu bloc, si scrie raspunsurile in output
+    :param network: reteaua bayesiana
+    :param lines: un iterabil de linii JSON
+    :param output: fisierul in care se scriu raspunsurile
+    :param algorithm: algoritmul de inferenta exacta
+    :param log_space: True pentru calcul in spatiul logaritmic
+    :param workers: numarul de procese (1 pentru executie in procesul curent)
+    :param chunk_size: numarul maxim de linii citite si scrise deodata
+    :return: statisticile rularii, un dictionar
+    """
+    if algorithm == "junction_tree" and network.junction_tree is None:
+        # arborele se construieste o singura data si este trimis proceselor impreuna cu reteaua
+        network.compile(log_space)
+    pool = ParallelInference(network, workers) if workers > 1 else None
+
+    latencies = []
+    count, errors = 0, 0
+    started = time.perf_counter()
+    lines = (line for line in lines if line.strip())
+    try:
+        while True:
+            chunk = list(islice(lines, chunk_size))
+            if not chunk:
+                break
+            parsed = [parse_line(line) for line in chunk]
+            tasks = [(request, algorithm, log_space) for request, error in parsed if error is None]
+            if pool is not None:
+                results = iter(pool.executor.map(answer_in_worker, tasks,
+                                                 chunksize=max(1, len(tasks) // (4 * workers))))
+            else:
+                results = (answer(network, *task) for task in tasks)
+
+            responses = []
+            for request, error in parsed:
+                if error is not None:
+                    responses.append({"error": error})
+                    continue
+                response, latency = next(results)
+                responses.append(response)
+                latencies.append(latency)
+            count += len(responses)
+            errors += sum("error" in response for response in responses)
+            output.write("".join(json.dumps(response, allow_nan=False) + "\n" for response in responses))
+            output.flush()
+    finally:
+        if pool is not None:
+            pool.close()
+
+    return summary(latencies, count, errors, time.perf_counter() - started)
+
+
+def summary(latencies, count, errors, elapsed):
+    """
+    Functie care calculeaza statisticile rularii
+    :param latencies: duratele calculelor, in secunde
+    :param count: numarul de interogari (inclusiv liniile invalide)
+    :param errors: numarul de interogari cu erori
+    :param elapsed: durata totala, in secunde
+    :return: un dictionar cu numarul de interogari, debitul si latentele p50/p99 (in secunde)
+    """
+    stats = {"queries": count, "errors": errors, "elapsed": elapsed,
+             "queries_per_second": count / elapsed if elapsed > 0 else 0.0,
+             "p50": None, "p99": None}
+    if latencies:
+        stats["p50"], stats["p99"] = (float(value) for value in np.percentile(latencies, [50, 99]))
+    return stats
+
+
+def format_summary(stats):
+    """
+    Functie care formateaza statisticile rularii pentru afisare
+    :param stats: statisticile intoarse de run
+    :return: un sir de caractere
+    """
+    text = (f"{stats['queries']} queries ({stats['errors']} errors) in {stats['elapsed']:.3f} s, "
+            f"{stats['queries_per_second']:.1f} queries/s")
+    if stats["p50"] is not None:
+        text += f", latency p50 {stats['p50'] * 1000:.3f} ms, p99 {stats['p99'] * 1000:.3f} ms"
+    return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Answer JSON-lines queries against a Bayesian network.")
+    parser.add_argument("network", help="network file (JSON or binary)")
+    parser.add_argument("--input", help="JSON-lines query file (default: stdin)")
+    parser.add_argument("--output", help="JSON-lines result file (default: stdout)")
+    parser.add_argument("--algorithm", default="junction_tree",
+                        choices=["enumeration", "memoized", "variable_elimination", "junction_tree"],
+                        help="exact inference algorithm")
+    parser.add_argument("--log-space", action="store_true", help="compute in log-space (also reports log P(e))")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="number of lines read and written at once")
+    arguments = parser.parse_args(argv)
+
+    network = BayesianNetwork(arguments.network)
+    source = open(arguments.input, "r") if arguments.input else sys.stdin
+    target = open(arguments.output, "w") if arguments.output else sys.stdout
+    try:
+        stats = run(network, source, target, arguments.algorithm, arguments.log_space,
+                    arguments.workers, arguments.chunk_size)
+    finally:
+        if arguments.input:
+            source.close()
+        if arguments.output:
+            target.close()
+    print(format_summary(stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Modulul inference_session implementeaza o sesiune de inferenta incrementala: evidentele se adauga
+sau se retrag una cate una, iar arborele de clici pastreaza mesajele deja calculate. O observatie
+noua invalideaza doar mesajele care pleaca din clica nodului observat, deci o interogare dupa o
+schimbare recalculeaza doar mesajele afectate, nu intreaga retea.
+"""
+class InferenceSession:
+    def __init__(self, network, tree=None):
+        """
+        Constructorul clasei InferenceSession
+        :param network: reteaua bayesiana
+        :param tree: arborele de clici folosit (implicit cel al retelei, construit daca lipseste);
+                     poate fi folosit si de alte interogari, sesiunea isi reface evidentele inainte de fiecare calcul
+        """
+        self.network = network
+        self.tree = tree if tree is not None else network.junction_tree or network.compile()
+        self.evidence = {}
+        self.assignment = [-1] * len(network.nodes)
+
+    def observe(self, node, value):
+        """
+        Functie care adauga (sau modifica) o evidenta
+        :param node: nodul observat
+        :param value: valoarea observata
+        """
+        index = self.network.node_index[node]
+        value_index = self.network.value_index[index]
+        if value not in value_index:
+            raise ValueError(f"Unknown value '{value}' for node '{node}'")
+        self.evidence[node] = value
+        self.assignment[index] = value_index[value]
+        self.tree.set_value(index, self.assignment[index])
+
+    def retract(self, node):
+        """
+        Functie care retrage evidenta unui nod
+        :param node: nodul observat anterior
+        """
+        if node not in self.evidence:
+            raise ValueError(f"Node '{node}' is not observed")
+        del self.evidence[node]
+        index = self.network.node_index[node]
+        self.assignment[index] = -1
+        self.tree.set_value(index, -1)
+
+    def reset(self):
+        """
+        Functie care retrage toate evidentele
+        """
+        for node in list(self.evidence):
+            self.retract(node)
+
+    def posterior(self, node):
+        """
+        Functie care calculeaza distributia unui nod, data fiind evidenta curenta a sesiunii
+        :param node: nodul interogat
+        :return: o distributie de probabilitate normalizata, un dictionar valoare:probabilitate
+        """
+        index = self.network.node_index[node]
+        evidence = {observed: value for observed, value in self.evidence.items() if observed != node}
+
+        def compute():
+            # ca in enumeration_ask, evidenta nodului interogat nu se foloseste; daca arborele a fost
+            # folosit intre timp cu alte evidente, se invalideaza doar diferentele
+            assignment = list(self.assignment)
+            assignment[index] = -1
+            self.tree.set_assignment(assignment)
+            return self.network.normalize(index, self.tree.node_belief(index), self.tree.log_space)
+
+        return self.network.cached_result("query", node, evidence, compute)
+
+    def probability_of_evidence(self):
+        """
+        Functie care calculeaza probabilitatea evidentei curente a sesiunii
+        :return: P(E=e) (log P(E=e) pentru un arbore in spatiul logaritmic)
+        """
+        self.tree.set_assignment(self.assignment)
+        return self.tree.probability_of_evidence()
@@ -0,0 +1,259 @@
+import numpy as np
+from variable_elimination import Factor, build_factors, elimination_order, log_sum_exp
+
+"""
+Modulul junction_tree compileaza reteaua bayesiana intr-un arbore de clici (junction tree)
+si calculeaza marginalele prin transmitere de mesaje Shafer-Shenoy.
+Mesajele sunt pastrate intre interogari; la schimbarea evidentelor se recalculeaza
+doar mesajele care pleaca din clica afectata. In modul logaritmic potentialele si mesajele
+contin logaritmii valorilor.
+"""
+class JunctionTree:
+    def __init__(self, network, heuristic="min_fill", log_space=False):
+        """
+        Constructorul clasei JunctionTree
+        Functie care moralizeaza si trianguleaza graful retelei si construieste arborele de clici
+        :param network: reteaua bayesiana (compilata)
+        :param heuristic: euristica pentru ordinea de eliminare folosita la triangulare
+        :param log_space: True pentru potentiale si mesaje in spatiul logaritmic
+        """
+        self.network = network
+        self.log_space = log_space
+        n_nodes = len(network.nodes)
+        factors = build_factors(network, range(n_nodes), [-1] * n_nodes, log_space)
+
+        # graful moral: fiecare nod este legat de parintii sai, iar parintii sunt legati intre ei
+        neighbors = {node: set() for node in range(n_nodes)}
+        for factor in factors:
+            for var in factor.variables:
+                neighbors[var].update(v for v in factor.variables if v != var)
+
+        # triangularea: la eliminarea unui nod, el si vecinii sai formeaza o clica. Separatorul (vecinii) este
+        # inclus in clica vecinului eliminat primul, de care se leaga clica nodului; rezulta direct un arbore de
+        # clici, fara a compara toate perechile de clici
+        order = elimination_order(factors, range(n_nodes), heuristic)
+        position = {var: i for i, var in enumerate(order)}
+        node_clique = {}
+        clique_size = {}
+        cliques = []
+        edges = []
+        self.roots = []
+        children = {var: [] for var in order}
+        for var in order:
+            adjacent = neighbors.pop(var)
+            clique_size[var] = len(adjacent) + 1
+            # o clica inclusa in alta este inclusa in clica unui copil cu exact un nod in plus,
+            # deci se contopeste cu aceasta
+            merged = next((child for child in children[var] if clique_size[child] == clique_size[var] + 1), None)
+            if merged is not None:
+                node_clique[var] = node_clique[merged]
+            else:
+                node_clique[var] = len(cliques)
+                cliques.append(frozenset(adjacent | {var}))
+            for child in children[var]:
+                if node_clique[child] != node_clique[var]:
+                    edges.append((node_clique[child], node_clique[var]))
+            if adjacent:
+                children[min(adjacent, key=position.get)].append(var)
+            else:
+                # cate o clica radacina pentru fiecare componenta conexa a arborelui: clica ultimului nod eliminat
+                self.roots.append(node_clique[var])
+            for a in adjacent:
+                neighbors[a].discard(var)
+                neighbors[a].update(adjacent - {a})
+        self.cliques = [tuple(sorted(clique)) for clique in cliques]
+
+        self.adjacent = {i: [] for i in range(len(self.cliques))}
+        for i, j in edges:
+            self.adjacent[i].append(j)
+            self.adjacent[j].append(i)
+
+        # clicile care contin fiecare nod; clica "acasa" a unui nod (cea mai mica clica in care apare)
+        # este cea in care se introduc evidentele
+        containing = [[] for _ in range(n_nodes)]
+        for c, clique in enumerate(self.cliques):
+            for node in clique:
+                containing[node].append(c)
+        self.home = [min(containing[node], key=lambda c: len(self.cliques[c])) for node in range(n_nodes)]
+
+        # fiecare tabel de probabilitate se atribuie celei mai mici clici care contine familia nodului
+        unit = np.zeros if log_space else np.ones
+        self.base_potentials = [unit([len(network.domains[v]) for v in clique]) for clique in self.cliques]
+        for factor in factors:
+            family = set(factor.variables)
+            c = min((c for c in containing[factor.variables[-1]] if family <= cliques[c]),
+                    key=lambda c: len(self.cliques[c]))
+            if log_space:
+                self.base_potentials[c] = self.base_potentials[c] + factor.aligned(list(self.cliques[c]))
+            else:
+                self.base_potentials[c] = self.base_potentials[c] * factor.aligned(list(self.cliques[c]))
+
+        self.assignment = [-1] * n_nodes
+        self.potentials = {}
+        self.messages = {}
+        self.messages_computed = 0
+
+    def set_evidence(self, evidence):
+        """
+        Functie care seteaza evidentele in arbore; doar nodurile a caror valoare s-a schimbat
+        invalideaza mesajele care pleaca din clica lor
+        :param evidence: un dictionar de perechi nod:valoare
+        """
+        self.set_assignment(self.network.encode_evidence(evidence))
+
+    def set_assignment(self, assignment):
+        """
+        Functie care seteaza evidentele codificate ca indici
+        :param assignment: indicii valorilor observate pentru fiecare nod (-1 pentru nodurile neobservate)
+        """
+        for node, value in enumerate(assignment):
+            self.set_value(node, value)
+
+    def set_value(self, node, value):
+        """
+        Functie care seteaza (sau sterge) evidenta unui singur nod; daca valoarea se schimba,
+        se invalideaza doar mesajele care pleaca din clica "acasa" a nodului
+        :param node: indicele nodului
+        :param value: indicele valorii observate (-1 pentru un nod neobservat)
+        """
+        if self.assignment[node] != value:
+            self.assignment[node] = value
+            self.invalidate(self.home[node])
+
+    def invalidate(self, clique):
+        """
+        Functie care sterge potentialul unei clici si toate mesajele care pleaca din ea spre restul arborelui
+        :param clique: indicele clicii modificate
+        """
+        self.potentials.pop(clique, None)
+        stack = [clique]
+        visited = {clique}
+        while stack:
+            current = stack.pop()
+            for neighbor in self.adjacent[current]:
+                if neighbor not in visited:
+                    visited.add(neighbor)
+                    self.messages.pop((current, neighbor), None)
+                    stack.append(neighbor)
+
+    def potential(self, clique):
+        """
+        Functie care calculeaza potentialul unei clici: tabelele atribuite ei inmultite cu evidentele
+        nodurilor care au clica drept clica "acasa"
+        :param clique: indicele clicii
+        :return: un factor definit pe variabilele clicii
+        """
+        if clique not in self.potentials:
+            table = self.base_potentials[clique]
+            for axis, node in enumerate(self.cliques[clique]):
+                if self.home[node] == clique and self.assignment[node] >= 0:
+                    shape = [1] * table.ndim
+                    shape[axis] = -1
+                    if self.log_space:
+                        indicator = np.full(table.shape[axis], -np.inf)
+                        indicator[self.assignment[node]] = 0.0
+                        table = table + indicator.reshape(shape)
+                    else:
+                        indicator = np.zeros(table.shape[axis])
+                        indicator[self.assignment[node]] = 1.0
+                        table = table * indicator.reshape(shape)
+            self.potentials[clique] = Factor(self.cliques[clique], table, self.log_space)
+        return self.potentials[clique]
+
+    def message(self, source, target):
+        """
+        Functie care calculeaza mesajul Shafer-Shenoy de la o clica la o clica vecina,
+        presupunand ca mesajele care intra in sursa sunt deja calculate
+        :param source: clica sursa
+        :param target: clica destinatie
+        :return: un factor definit pe separatorul celor doua clici
+        """
+        if (source, target) not in self.messages:
+            factor = self.potential(source)
+            for neighbor in self.adjacent[source]:
+                if neighbor != target:
+                    factor = factor.product(self.messages[(neighbor, source)])
+            for var in self.cliques[source]:
+                if var not in self.cliques[target]:
+                    factor = factor.sum_out(var)
+            self.messages[(source, target)] = factor
+            self.messages_computed += 1
+        return self.messages[(source, target)]
+
+    def belief(self, clique):
+        """
+        Functie care calculeaza credinta (potentialul calibrat) unei clici, transmitand
+        doar mesajele spre ea care lipsesc din cache
+        :param clique: indicele clicii
+        :return: un factor nenormalizat definit pe variabilele clicii
+        """
+        # parcurgere in latime de la clica data; mesajele se calculeaza de la frunze spre ea
+        order = [(clique, None)]
+        visited = {clique}
+        for current, _ in order:
+            for neighbor in self.adjacent[current]:
+                if neighbor not in visited:
+                    visited.add(neighbor)
+                    order.append((neighbor, current))
+        missing = [(source, target) for source, target in reversed(order[1:])
+                   if (source, target) not in self.messages]
+        monitor = self.network.monitor
+        if monitor is not None:
+            monitor.start(len(missing))
+        for source, target in missing:
+            self.message(source, target)
+            if monitor is not None:
+                monitor.step()
+
+        factor = self.potential(clique)
+        for neighbor in self.adjacent[clique]:
+            factor = factor.product(self.messages[(neighbor, clique)])
+        return factor
+
+    def calibrate(self):
+        """
+        Functie care calculeaza toate mesajele din arbore, astfel incat orice marginala sa fie disponibila
+        """
+        for clique in range(len(self.cliques)):
+            self.belief(clique)
+
+    def node_belief(self, node):
+        """
+        Functie care calculeaza distributia nenormalizata a unui nod din credinta clicii sale
+        :param node: indicele nodului
+        :return: o lista de probabilitati nenormalizate (sau logaritmii lor) pt. valorile nodului
+        """
+        factor = self.belief(self.home[node])
+        for var in self.cliques[self.home[node]]:
+            if var != node:
+                factor = factor.sum_out(var)
+        return factor.table.tolist()
+
+    def marginals(self):
+        """
+        Functie care calibreaza arborele si returneaza distributiile tuturor nodurilor
+        :return: un dictionar nod:distributie de probabilitate normalizata
+        """
+        self.calibrate()
+        result = {}
+        for node, name in enumerate(self.network.nodes):
+            probs = np.asarray(self.node_belief(node))
+            if self.log_space:
+                probs = np.exp(probs - log_sum_exp(probs, 0))
+            else:
+                probs = probs / probs.sum()
+            result[name] = dict(zip(self.network.domains[node], probs.tolist()))
+        return result
+
+    def probability_of_evidence(self):
+        """
+        Functie care calculeaza probabilitatea evidentelor curente P(E=e)
+        :return: produsul sumelor credintelor clicilor radacina ale fiecarei componente
+                 (in modul logaritmic, log P(E=e))
+        """
+        if self.log_space:
+            return float(sum(log_sum_exp(self.belief(root).table.ravel(), 0) for root in self.roots))
+        result = 1.0
+        for root in self.roots:
+            result *= float(self.belief(root).table.sum())
+        return result
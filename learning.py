@@ -0,0 +1,262 @@
+import argparse
+import csv
+import json
+import os
+from itertools import islice, zip_longest
+import numpy as np
+
+"""
+Modulul learning invata tabelele de probabilitate ale unei retele bayesiene din date: structura (parintii
+si domeniile nodurilor) este preluata dintr-o retea incarcata, iar observatiile sunt citite dintr-un fisier
+CSV sau JSON-lines, in blocuri de marime limitata. Pentru fiecare bloc, valorile fiecarei coloane sunt
+codificate ca indici, iar numaratorile fiecarei familii (nod si parinti) se adauga cu numpy.bincount,
+fara bucle Python pe randuri. Memoria folosita depinde doar de marimea blocului si de marimea tabelelor.
+Valorile lipsa (celule goale sau chei absente) exclud randul doar din familiile care contin nodul respectiv.
+"""
+class ParameterLearner:
+    def __init__(self, network, pseudocount=1.0):
+        """
+        Constructorul clasei ParameterLearner
+        :param network: reteaua bayesiana a carei structura se foloseste
+        :param pseudocount: numaratoarea adaugata fiecarei valori din fiecare rand al tabelelor (netezire
+                            Dirichlet; 1 pentru netezirea Laplace, 0 pentru estimarea de verosimilitate maxima)
+        """
+        if pseudocount < 0:
+            raise ValueError("Pseudocount must be non-negative")
+        self.network = network
+        self.pseudocount = pseudocount
+        # numaratorile fiecarei familii, cu aceeasi forma ca tabelele retelei (parinti..., nod)
+        self.counts = [np.zeros(cpt.shape, dtype=np.int64) for cpt in network.cpts]
+        self.rows_seen = 0
+
+    def encode_column(self, node, column):
+        """
+        Functie care codifica valorile unei coloane ca indici in domeniul nodului
+        :param node: indicele nodului
+        :param column: un numpy.ndarray de siruri de caractere (sirul gol pentru valorile lipsa)
+        :return: un numpy.ndarray de indici (-1 pentru valorile lipsa)
+        """
+        # doar valorile distincte se cauta in domeniu, apoi indicii se extind la toate randurile
+        distinct, inverse = np.unique(column, return_inverse=True)
+        value_index = self.network.value_index[node]
+        lookup = np.empty(len(distinct), dtype=np.int64)
+        for position, value in enumerate(distinct):
+            if value == "":
+                lookup[position] = -1
+            elif value in value_index:
+                lookup[position] = value_index[value]
+            else:
+                raise ValueError(f"Unknown value '{value}' for node '{self.network.nodes[node]}'")
+        return lookup[inverse.reshape(-1)]
+
+    def update(self, columns, n_rows):
+        """
+        Functie care adauga numaratorile unui bloc de observatii
+        :param columns: un dictionar nume nod:numpy.ndarray de siruri de caractere (sirul gol pentru valorile lipsa);
+                        nodurile care lipsesc din dictionar sunt considerate neobservate
+        :param n_rows: numarul de randuri din bloc
+        """
+        if n_rows == 0:
+            return
+        codes = [self.encode_column(node, columns[name]) if name in columns else np.full(n_rows, -1)
+                 for node, name in enumerate(self.network.nodes)]
+
+        for node, counts in enumerate(self.counts):
+            family = self.network.parent_indices[node] + (node,)
+            # indicele plat al fiecarui rand in tabelul familiei, ca in counts.ravel()
+            flat = np.zeros(n_rows, dtype=np.int64)
+            observed = np.ones(n_rows, dtype=bool)
+            for var in family:
+                flat = flat * len(self.network.domains[var]) + codes[var]
+                observed &= codes[var] >= 0
+            counts += np.bincount(flat[observed], minlength=counts.size).reshape(counts.shape)
+        self.rows_seen += n_rows
+
+    def fit_file(self, filename, chunk_size=100000, file_format=None):
+        """
+        Functie care adauga numaratorile tuturor observatiilor dintr-un fisier, citit bloc cu bloc;
+        apelata de mai multe ori (sau dupa load_counts), numaratorile se aduna, deci tabelele pot fi
+        reinvatate incremental cand apar date noi
+        :param filename: fisierul CSV (cu antet format din numele nodurilor) sau JSON-lines (un obiect pe linie)
+        :param chunk_size: numarul maxim de randuri tinute in memorie
+        :param file_format: "csv" sau "jsonl"; implicit se alege dupa extensia fisierului
+        :return: numarul de randuri citite
+        """
+        if file_format is None:
+            file_format = "jsonl" if filename.endswith((".jsonl", ".ndjson")) else "csv"
+        if file_format not in ("csv", "jsonl"):
+            raise ValueError(f"Unknown data format: {file_format}")
+
+        rows_before = self.rows_seen
+        # numaratorile se refac daca fisierul contine o eroare, astfel incat blocurile deja citite nu raman adunate
+        saved_counts = [counts.copy() for counts in self.counts]
+        try:
+            with open(filename, "r", newline="") as file:
+                if file_format == "csv":
+                    self.fit_csv(file, filename, chunk_size)
+                else:
+                    self.fit_jsonl(file, filename, chunk_size)
+        except BaseException:
+            self.counts = saved_counts
+            self.rows_seen = rows_before
+            raise
+        return self.rows_seen - rows_before
+
+    def fit_csv(self, file, filename, chunk_size):
+        """
+        Functie care adauga numaratorile unui fisier CSV deschis, bloc cu bloc
+        :param file: fisierul deschis
+        :param filename: numele fisierului, folosit in mesajele de eroare
+        :param chunk_size: numarul maxim de randuri tinute in memorie
+        """
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            return
+        header = [name.strip() for name in header]
+        while True:
+            chunk = list(islice(reader, chunk_size))
+            if not chunk:
+                break
+            # transpunerea randurilor in coloane; randurile scurte se completeaza cu valori lipsa
+            columns = {name: np.char.strip(np.array(column, dtype=str))
+                       for name, column in zip(header, zip_longest(*chunk, fillvalue=""))}
+            try:
+                self.update(columns, len(chunk))
+            except ValueError as e:
+                raise ValueError(f"{filename}: {e}") from e
+
+    def fit_jsonl(self, file, filename, chunk_size):
+        """
+        Functie care adauga numaratorile unui fisier JSON-lines deschis, bloc cu bloc
+        :param file: fisierul deschis
+        :param filename: numele fisierului, folosit in mesajele de eroare
+        :param chunk_size: numarul maxim de randuri tinute in memorie
+        """
+        lines = ((number, line) for number, line in enumerate(file, 1) if line.strip())
+        while True:
+            chunk = []
+            for number, line in islice(lines, chunk_size):
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{filename}, line {number}: invalid JSON ({e.msg})") from e
+                if not isinstance(row, dict):
+                    raise ValueError(f"{filename}, line {number}: each line must be a JSON object")
+                chunk.append(row)
+            if not chunk:
+                break
+            columns = {}
+            for name in self.network.nodes:
+                column = np.array([row.get(name) for row in chunk], dtype=object)
+                column[np.equal(column, None)] = ""
+                columns[name] = column.astype(str)
+            try:
+                self.update(columns, len(chunk))
+            except ValueError as e:
+                raise ValueError(f"{filename}: {e}") from e
+
+    def merge(self, other):
+        """
+        Functie care aduna numaratorile altui learner cu aceeasi structura (de ex. invatat pe alt fisier)
+        :param other: celalalt ParameterLearner
+        """
+        if [counts.shape for counts in other.counts] != [counts.shape for counts in self.counts]:
+            raise ValueError("Cannot merge counts of networks with different structures")
+        for counts, other_counts in zip(self.counts, other.counts):
+            counts += other_counts
+        self.rows_seen += other.rows_seen
+
+    def save_counts(self, filename):
+        """
+        Functie care salveaza numaratorile (format .npz), pentru a continua invatarea mai tarziu
+        :param filename: numele fisierului, folosit exact (numpy.savez ar adauga altfel extensia .npz)
+        """
+        with open(filename, "wb") as file:
+            np.savez(file, rows_seen=self.rows_seen, nodes=np.array(self.network.nodes),
+                     **{f"counts_{node}": counts for node, counts in enumerate(self.counts)})
+
+    def load_counts(self, filename):
+        """
+        Functie care adauga numaratorile salvate cu save_counts la cele curente
+        :param filename: numele fisierului
+        """
+        with np.load(filename) as data:
+            if data["nodes"].tolist() != list(self.network.nodes):
+                raise ValueError("Saved counts belong to a network with different nodes")
+            for node, counts in enumerate(self.counts):
+                saved = data[f"counts_{node}"]
+                if saved.shape != counts.shape:
+                    raise ValueError(f"Saved counts of node '{self.network.nodes[node]}' have a different shape")
+                counts += saved
+            self.rows_seen += int(data["rows_seen"])
+
+    def cpts(self):
+        """
+        Functie care calculeaza tabelele de probabilitate din numaratori, cu netezirea Dirichlet;
+        randurile fara nicio observatie (posibile doar fara netezire) pastreaza probabilitatile din retea
+        :return: o lista de numpy.ndarray, cate unul pentru fiecare nod
+        """
+        tables = []
+        for node, counts in enumerate(self.counts):
+            smoothed = counts + self.pseudocount
+            totals = smoothed.sum(axis=-1, keepdims=True)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                table = smoothed / totals
+            tables.append(np.where(totals > 0, table, self.network.cpts[node]))
+        return tables
+
+    def to_json(self):
+        """
+        Functie care construieste reteaua invatata in schema JSON a retelelor
+        :return: un dictionar {"nodes": {...}}, ca in test1_network.json
+        """
+        network = self.network
+        nodes = {}
+        for node, table in enumerate(self.cpts()):
+            parents = network.parent_indices[node]
+            domain = network.domains[node]
+            if not parents:
+                probabilities = dict(zip(domain, table.tolist()))
+            else:
+                probabilities = {}
+                for combination in np.ndindex(*table.shape[:-1]):
+                    key = ",".join(network.domains[parent][i] for parent, i in zip(parents, combination))
+                    probabilities[key] = dict(zip(domain, table[combination].tolist()))
+            nodes[network.nodes[node]] = {"parents": [network.nodes[parent] for parent in parents],
+                                          "probabilities": probabilities}
+        return {"nodes": nodes}
+
+    def save(self, filename):
+        """
+        Functie care scrie reteaua invatata intr-un fisier JSON, incarcabil apoi cu BayesianNetwork(filename)
+        :param filename: numele fisierului JSON
+        """
+        with open(filename, "w") as file:
+            json.dump(self.to_json(), file, indent=2)
+
+
+if __name__ == "__main__":
+    from bayesian_network import BayesianNetwork
+
+    parser = argparse.ArgumentParser(description="Learn the probability tables of a network from data.")
+    parser.add_argument("structure", help="network file (JSON or binary) whose parents and values are used")
+    parser.add_argument("data", nargs="+", help="CSV (header of node names) or JSON-lines data files")
+    parser.add_argument("--output", required=True, help="JSON network file to write")
+    parser.add_argument("--pseudocount", type=float, default=1.0,
+                        help="Dirichlet pseudocount per value (1 = Laplace smoothing, 0 = maximum likelihood)")
+    parser.add_argument("--chunk-size", type=int, default=100000, help="number of rows read at once")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="data format (default: from the file extension)")
+    parser.add_argument("--counts", help="counts file (.npz): merged before learning if it exists, saved afterwards")
+    arguments = parser.parse_args()
+
+    learner = ParameterLearner(BayesianNetwork(arguments.structure), arguments.pseudocount)
+    if arguments.counts:
+        if os.path.exists(arguments.counts):
+            learner.load_counts(arguments.counts)
+    for data_file in arguments.data:
+        learner.fit_file(data_file, arguments.chunk_size, arguments.format)
+    if arguments.counts:
+        learner.save_counts(arguments.counts)
+    learner.save(arguments.output)
+    print(f"Learned from {learner.rows_seen} rows")
@@ -1,8 +1,13 @@
+import argparse
 import tkinter as tk
 from bayesian_gui import BayesianGUI
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bayesian network inference GUI.")
+    parser.add_argument("--result-cache", metavar="FILE",
+                        help="SQLite file that keeps query results between sessions (default: memory only)")
+    arguments = parser.parse_args()
+
     root = tk.Tk()
-    app = BayesianGUI(root)
+    app = BayesianGUI(root, arguments.result_cache)
     root.mainloop()
-
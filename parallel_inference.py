@@ -0,0 +1,213 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from variable_elimination import log_sum
+
+"""
+Modulul parallel_inference distribuie inferenta prin enumerare pe mai multe procese.
+Reteaua compilata este trimisa o singura data fiecarui proces, la pornirea lui;
+sarcinile contin doar indici (lista nodurilor si atribuirea curenta).
+"""
+# reteaua procesului curent, setata o singura data de initializatorul fiecarui proces
+worker_network = None
+
+
+def init_worker(network):
+    """
+    Functie care initializeaza un proces: retine reteaua primita
+    :param network: reteaua bayesiana compilata
+    """
+    global worker_network
+    worker_network = network
+
+
+def enumerate_branch(variables, position, assignment, log_space=False):
+    """
+    Functie executata in procese: calculeaza o ramura a enumerarii
+    :param variables: lista indicilor nodurilor
+    :param position: pozitia de la care continua enumerarea
+    :param assignment: atribuirea curenta (evidente si valorile ramurii)
+    :param log_space: True pentru enumerarea in spatiul logaritmic
+    :return: suma ramurii (logaritmul ei in spatiul logaritmic)
+    """
+    if log_space:
+        return worker_network._enumerate_log(variables, position, assignment)
+    return worker_network._enumerate_all(variables, position, assignment)
+
+
+def run_query(query):
+    """
+    Functie executata in procese: raspunde unei interogari independente
+    :param query: un tuplu (nod interogat, evidente, algoritm, log_space); nodul None inseamna o interogare P(E=e)
+    :return: distributia nodului interogat sau probabilitatea evidentelor
+    """
+    query_node, evidence, algorithm, log_space = query
+    if query_node is None:
+        return worker_network.p_e_query(evidence, algorithm=algorithm, log_space=log_space)
+    worker_network.set_evidence(evidence)
+    return worker_network.enumeration_ask(query_node, algorithm=algorithm, log_space=log_space)
+
+
+"""
+Clasa ParallelInference se ocupa de executia paralela a inferentei pe un grup de procese
+"""
+class ParallelInference:
+    def __init__(self, network, workers=None, tasks_per_worker=4):
+        """
+        Constructorul clasei ParallelInference
+        :param network: reteaua bayesiana compilata
+        :param workers: numarul de procese (implicit numarul de procesoare)
+        :param tasks_per_worker: numarul minim de ramuri trimise fiecarui proces pentru o interogare
+        """
+        self.network = network
+        self.workers = workers or os.cpu_count() or 1
+        self.tasks_per_worker = tasks_per_worker
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                            initargs=(network,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Functie care opreste procesele
+        """
+        self.executor.shutdown()
+
+    def split(self, variables, position, assignment, depth, log_space=False):
+        """
+        Functie care parcurge primele niveluri ale enumerarii la fel ca _enumerate_all, dar in loc sa
+        coboare sub nivelul dat trimite ramura unui proces
+        :param variables: lista indicilor nodurilor
+        :param position: pozitia nodului curent in variables
+        :param assignment: atribuirea curenta, modificata pe loc
+        :param depth: numarul de noduri neobservate care se mai despart in ramuri
+        :param log_space: True pentru enumerarea in spatiul logaritmic (probabilitatile din plan sunt logaritmi)
+        :return: planul calculului: ("value", numar), ("task", future), ("product", prob, plan) sau
+                 ("sum", [(prob, plan), ...])
+        """
+        network = self.network
+        if position == len(variables):
+            return ("value", 0.0 if log_space else 1.0)
+
+        first = variables[position]
+        rows = network.log_cpt_rows if log_space else network.cpt_rows
+        row = rows[first][sum(assignment[parent] * stride for parent, stride
+                              in zip(network.parent_indices[first], network.parent_strides[first]))]
+        if assignment[first] >= 0:
+            return ("product", row[assignment[first]],
+                    self.split(variables, position + 1, assignment, depth, log_space))
+        if depth == 0:
+            return ("task", self.executor.submit(enumerate_branch, variables, position, list(assignment), log_space))
+
+        branches = []
+        for value, prob in enumerate(row):
+            assignment[first] = value
+            branches.append((prob, self.split(variables, position + 1, assignment, depth - 1, log_space)))
+        assignment[first] = -1
+        return ("sum", branches)
+
+    def evaluate(self, plan, log_space=False):
+        """
+        Functie care combina rezultatele ramurilor in aceeasi ordine a operatiilor ca enumerarea seriala,
+        astfel incat rezultatul este identic
+        :param plan: planul intors de split
+        :param log_space: True daca planul a fost construit in spatiul logaritmic
+        :return: valoarea calculului
+        """
+        kind = plan[0]
+        if kind == "value":
+            return plan[1]
+        if kind == "task":
+            return plan[1].result()
+        if kind == "product":
+            if log_space:
+                return plan[1] + self.evaluate(plan[2], log_space)
+            return plan[1] * self.evaluate(plan[2])
+        if log_space:
+            return log_sum([prob + self.evaluate(branch, log_space) for prob, branch in plan[1]])
+        total = 0
+        for prob, branch in plan[1]:
+            total += prob * self.evaluate(branch)
+        return total
+
+    def split_depth(self, variables, assignment, n_branches):
+        """
+        Functie care alege cate noduri neobservate se despart in ramuri, astfel incat fiecare proces
+        sa primeasca cel putin tasks_per_worker ramuri
+        :param variables: lista indicilor nodurilor
+        :param assignment: atribuirea curenta
+        :param n_branches: numarul de ramuri de pornire (de ex. valorile nodului interogat)
+        :return: numarul de niveluri
+        """
+        depth = 0
+        for node in variables:
+            if n_branches >= self.workers * self.tasks_per_worker:
+                break
+            if assignment[node] < 0:
+                n_branches *= len(self.network.domains[node])
+                depth += 1
+        return depth
+
+    def enumeration_ask(self, query_node, evidence, log_space=False):
+        """
+        Functie care se ocupa de inferenta prin enumerare, impartind calculul pe valorile nodului
+        interogat si pe primele noduri neobservate
+        :param query_node: nodul interogat
+        :param evidence: un dictionar de perechi nod:valoare
+        :param log_space: True pentru enumerarea in spatiul logaritmic
+        :return: o distributie de probabilitate normalizata pt. variabila interogata
+        """
+        network = self.network
+        query_index, assignment = network.query_assignment(query_node, evidence)
+        variables = network.prune(query_index, assignment)
+        n_values = len(network.domains[query_index])
+        depth = self.split_depth(variables, assignment, n_values)
+
+        plans = []
+        for value in range(n_values):
+            assignment[query_index] = value
+            plans.append(self.split(variables, 0, assignment, depth, log_space))
+        return network.normalize(query_index, [self.evaluate(plan, log_space) for plan in plans], log_space)
+
+    def p_e_query(self, evidence, log_space=False):
+        """
+        Functie care calculeaza probabilitatea evidentelor P(E=e), impartind calculul pe primele noduri neobservate
+        :param evidence: nodurile observate
+        :param log_space: True pentru enumerarea in spatiul logaritmic
+        :return: probabilitatea evidentelor
+        """
+        if log_space:
+            return math.exp(self.log_p_e_query(evidence))
+        network = self.network
+        assignment = network.encode_evidence(evidence)
+        variables = network.prune_for_evidence(assignment)
+        depth = self.split_depth(variables, assignment, 1)
+        return self.evaluate(self.split(variables, 0, assignment, depth))
+
+    def log_p_e_query(self, evidence):
+        """
+        Functie care calculeaza log P(E=e) prin enumerarea in spatiul logaritmic, impartita pe procese
+        :param evidence: nodurile observate
+        :return: logaritmul probabilitatii evidentelor
+        """
+        network = self.network
+        assignment = network.encode_evidence(evidence)
+        variables = network.prune_for_evidence(assignment)
+        depth = self.split_depth(variables, assignment, 1)
+        return self.evaluate(self.split(variables, 0, assignment, depth, True), True)
+
+    def map_queries(self, queries, algorithm="enumeration", chunksize=16, log_space=False):
+        """
+        Functie care raspunde unui lot de interogari independente, impartite pe procese
+        :param queries: o lista de perechi (nod interogat, evidente); nodul None cere P(E=e)
+        :param algorithm: algoritmul de inferenta folosit in fiecare proces
+        :param chunksize: numarul de interogari trimise unui proces deodata
+        :param log_space: True pentru calcul in spatiul logaritmic
+        :return: lista rezultatelor, in ordinea interogarilor
+        """
+        tasks = [(query_node, evidence, algorithm, log_space) for query_node, evidence in queries]
+        return list(self.executor.map(run_query, tasks, chunksize=chunksize))
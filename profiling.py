@@ -0,0 +1,241 @@
+import time
+
+"""
+Modulul profiling implementeaza instrumentarea optionala a inferentei: cand este activata, metodele
+retelei sunt inlocuite (doar pe instanta) cu variante care numara apelurile recursive ale enumerarii,
+ramurile parcurse si adancimea maxima, cronometreaza fazele unei interogari si calculeaza ratele de
+gasire in cache-uri. Cand este dezactivata, metodele instantei sunt sterse si se folosesc din nou
+cele ale clasei, deci inferenta nu plateste nimic pentru instrumentare.
+"""
+class InferenceProfiler:
+    # metodele recursive ale enumerarii, ale caror apeluri se numara (enumerarea memorata, iterativa,
+    # isi raporteaza singura numaratorile prin record_enumeration)
+    RECURSIVE = ("_enumerate_all", "_enumerate_log")
+    # fazele cronometrate si metodele care le corespund
+    PHASES = {"prune": ("prune", "prune_for_evidence", "prune_for_map"), "compile": ("compile",),
+              "normalize": ("normalize",)}
+
+    def __init__(self, network):
+        """
+        Constructorul clasei InferenceProfiler
+        :param network: reteaua bayesiana instrumentata
+        """
+        self.network = network
+        self.callbacks = []
+        # statisticile interogarii in curs (None intre interogari) si ale ultimei interogari terminate
+        self.current = None
+        self.last_stats = None
+
+    def add_callback(self, callback):
+        """
+        Functie care adauga o functie apelata cu statisticile fiecarei interogari terminate,
+        de exemplu pentru a le trimite unui sistem de metrici
+        :param callback: o functie cu un parametru, dictionarul de statistici
+        """
+        self.callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        """
+        Functie care elimina o functie adaugata cu add_callback
+        :param callback: functia eliminata
+        """
+        self.callbacks.remove(callback)
+
+    def wrapped_methods(self):
+        """
+        Functie care construieste variantele instrumentate ale metodelor retelei
+        :return: un dictionar nume:functie
+        """
+        methods = {"cached_result": self.profile_query, "probability": self.count_probability}
+        for name in self.RECURSIVE:
+            methods[name] = self.count_recursion(name)
+        for phase, names in self.PHASES.items():
+            for name in names:
+                methods[name] = self.time_phase(phase, name)
+        return methods
+
+    def attach(self):
+        """
+        Functie care inlocuieste metodele instantei retelei cu variantele instrumentate
+        """
+        self.network.__dict__.update(self.wrapped_methods())
+
+    def detach(self):
+        """
+        Functie care sterge variantele instrumentate, astfel incat se folosesc din nou metodele clasei
+        """
+        for name in self.wrapped_methods():
+            self.network.__dict__.pop(name, None)
+
+    def original(self, name):
+        """
+        Functie care preia metoda neinstrumentata a retelei
+        :param name: numele metodei
+        :return: metoda clasei, legata de retea
+        """
+        return getattr(type(self.network), name).__get__(self.network)
+
+    def new_stats(self, kind, query, evidence):
+        """
+        Functie care construieste statisticile goale ale unei interogari
+        :param kind: tipul interogarii ("query", "p_e", "log_p_e", "map" sau "log_map")
+        :param query: nodul interogat (None pentru P(E=e), lista nodurilor pentru MAP)
+        :param evidence: un dictionar de perechi nod:valoare
+        :return: un dictionar de statistici
+        """
+        return {"kind": kind, "query": query, "evidence_size": len(evidence),
+                "total_time": 0.0, "phases": {"prune": 0.0, "compile": 0.0, "infer": 0.0, "normalize": 0.0},
+                "load_time": self.network.load_time, "compile_time": self.network.compile_time,
+                "probability_calls": 0, "recursive_calls": 0, "branches": 0, "max_depth": 0, "cpt_lookups": 0,
+                "messages_computed": 0, "kept_nodes": None,
+                "memo_hits": 0, "memo_misses": 0, "memo_hit_rate": None,
+                "result_cache_hit": False, "result_cache_hit_rate": None, "error": None}
+
+    def profile_query(self, kind, query, evidence, compute):
+        """
+        Varianta instrumentata a lui cached_result, prin care trec toate interogarile exacte:
+        porneste statisticile interogarii, iar la final le completeaza, le pastreaza in last_stats
+        si le trimite functiilor adaugate cu add_callback
+        """
+        cached_result = self.original("cached_result")
+        if self.current is not None:
+            return cached_result(kind, query, evidence, compute)
+
+        network = self.network
+        stats = self.current = self.new_stats(kind, query, evidence)
+        computed = []
+
+        def counted_compute():
+            computed.append(True)
+            return compute()
+
+        memo_hits, memo_misses = network.memo_cache.hits, network.memo_cache.misses
+        tree = network.junction_tree
+        messages = tree.messages_computed if tree is not None else 0
+        network.last_pruning = None
+        started = time.perf_counter()
+        try:
+            return cached_result(kind, query, evidence, counted_compute)
+        except BaseException as e:
+            stats["error"] = type(e).__name__
+            raise
+        finally:
+            stats["total_time"] = time.perf_counter() - started
+            phases = stats["phases"]
+            if computed:
+                phases["infer"] = max(0.0, stats["total_time"] - phases["prune"] - phases["compile"]
+                                      - phases["normalize"])
+            stats["result_cache_hit"] = network.result_cache is not None and not computed
+
+            stats["memo_hits"] = network.memo_cache.hits - memo_hits
+            stats["memo_misses"] = network.memo_cache.misses - memo_misses
+            if stats["memo_hits"] + stats["memo_misses"]:
+                stats["memo_hit_rate"] = stats["memo_hits"] / (stats["memo_hits"] + stats["memo_misses"])
+            # o intrare gasita in cache-ul enumerarii memorate nu mai citeste tabelul nodului
+            stats["cpt_lookups"] = stats["recursive_calls"] - stats["branches"] - stats["memo_hits"]
+
+            # arborele poate fi reconstruit in timpul interogarii (de exemplu la schimbarea modului)
+            if network.junction_tree is not None:
+                stats["messages_computed"] = network.junction_tree.messages_computed - \
+                    (messages if network.junction_tree is tree else 0)
+            if network.last_pruning is not None:
+                stats["kept_nodes"] = len(network.last_pruning.kept_nodes)
+            if network.result_cache is not None:
+                cache_stats = network.result_cache.stats()
+                lookups = cache_stats["hits"] + cache_stats["misses"]
+                if lookups:
+                    stats["result_cache_hit_rate"] = cache_stats["hits"] / lookups
+            stats["compile_time"] = network.compile_time
+
+            self.current = None
+            self.last_stats = stats
+            for callback in list(self.callbacks):
+                callback(stats)
+
+    def count_probability(self, node, evidence):
+        """
+        Varianta instrumentata a lui probability, care numara apelurile
+        """
+        if self.current is not None:
+            self.current["probability_calls"] += 1
+        return self.original("probability")(node, evidence)
+
+    def count_recursion(self, name):
+        """
+        Functie care construieste varianta instrumentata a unei metode recursive a enumerarii; apelurile
+        recursive trec prin instanta, deci fiecare nivel al recursiei este numarat
+        :param name: numele metodei
+        :return: functia instrumentata
+        """
+        method = self.original(name)
+
+        def counted(variables, position, assignment):
+            stats = self.current
+            if stats is not None:
+                stats["recursive_calls"] += 1
+                if position > stats["max_depth"]:
+                    stats["max_depth"] = position
+                if position == len(variables):
+                    stats["branches"] += 1
+            return method(variables, position, assignment)
+
+        return counted
+
+    def record_enumeration(self, calls, branches, depth):
+        """
+        Functie apelata de enumerarea memorata la final, cu numaratorile parcurgerii ei
+        :param calls: numarul de pozitii vizitate (echivalentul apelurilor recursive)
+        :param branches: numarul de ramuri parcurse pana la capat
+        :param depth: adancimea maxima atinsa
+        """
+        stats = self.current
+        if stats is not None:
+            stats["recursive_calls"] += calls
+            stats["branches"] += branches
+            stats["max_depth"] = max(stats["max_depth"], depth)
+
+    def time_phase(self, phase, name):
+        """
+        Functie care construieste varianta cronometrata a unei metode
+        :param phase: faza careia i se adauga durata apelului
+        :param name: numele metodei
+        :return: functia instrumentata
+        """
+        method = self.original(name)
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                if self.current is not None:
+                    self.current["phases"][phase] += time.perf_counter() - started
+
+        return timed
+
+
+def format_stats(stats):
+    """
+    Functie care formateaza statisticile unei interogari pentru afisare
+    :param stats: dictionarul de statistici
+    :return: o lista de linii
+    """
+    phases = ", ".join(f"{phase} {seconds * 1000:.3f} ms" for phase, seconds in stats["phases"].items())
+    lines = [f"Total {stats['total_time'] * 1000:.3f} ms ({phases})\n"]
+    lines.append(f"Load {stats['load_time'] * 1000:.3f} ms"
+                 + (f", compile {stats['compile_time'] * 1000:.3f} ms" if stats["compile_time"] is not None else "")
+                 + "\n")
+    if stats["recursive_calls"]:
+        lines.append(f"Enumeration: {stats['recursive_calls']} calls, {stats['branches']} branches, "
+                     f"max depth {stats['max_depth']}, {stats['cpt_lookups']} table lookups\n")
+    if stats["messages_computed"]:
+        lines.append(f"Junction tree: {stats['messages_computed']} messages computed\n")
+    if stats["kept_nodes"] is not None:
+        lines.append(f"Pruning: {stats['kept_nodes']} nodes kept\n")
+    if stats["memo_hit_rate"] is not None:
+        lines.append(f"Memo cache: {stats['memo_hits']} hits, {stats['memo_misses']} misses "
+                     f"({stats['memo_hit_rate']:.1%})\n")
+    if stats["result_cache_hit_rate"] is not None:
+        lines.append(f"Result cache: {'hit' if stats['result_cache_hit'] else 'miss'} "
+                     f"(hit rate {stats['result_cache_hit_rate']:.1%})\n")
+    return lines
@@ -0,0 +1,227 @@
+import time
+import numpy as np
+
+"""
+Modulul sampling implementeaza inferenta aproximativa prin esantionare (likelihood weighting
+si Gibbs sampling). Esantioanele sunt generate vectorizat, in blocuri, cu numpy.
+Ponderile si scorurile se calculeaza in spatiul logaritmic, pentru a nu ajunge la 0 pe retele adanci.
+"""
+class SamplingResult:
+    def __init__(self, distribution, std_error, n_samples, elapsed, method, log_evidence=None):
+        """
+        Constructorul clasei SamplingResult
+        :param distribution: distributia estimata, un dictionar valoare:probabilitate
+        :param std_error: eroarea standard estimata pentru fiecare valoare
+        :param n_samples: numarul de esantioane folosite
+        :param elapsed: timpul de calcul, in secunde
+        :param method: metoda de esantionare folosita
+        :param log_evidence: estimarea lui log P(E=e), daca metoda o furnizeaza
+        """
+        self.distribution = distribution
+        self.std_error = std_error
+        self.n_samples = n_samples
+        self.elapsed = elapsed
+        self.method = method
+        self.log_evidence = log_evidence
+
+    def __repr__(self):
+        return (f"SamplingResult(method={self.method}, n_samples={self.n_samples}, "
+                f"distribution={self.distribution}, std_error={self.std_error})")
+
+
+def sample_categorical(probs, rng):
+    """
+    Functie care extrage cate o valoare din fiecare rand al unei matrice de distributii
+    :param probs: o matrice (nr. esantioane, nr. valori) cu randuri de suma 1
+    :param rng: generatorul de numere aleatoare
+    :return: un vector cu indicii valorilor extrase
+    """
+    cumulative = probs.cumsum(axis=1)
+    draws = rng.random(len(probs))[:, None] * cumulative[:, -1:]
+    return np.minimum((cumulative <= draws).sum(axis=1), probs.shape[1] - 1)
+
+
+def cpt_rows(network, node, codes, size, log_space=False):
+    """
+    Functie care preia, pentru fiecare esantion, randul din tabelul nodului dat de valorile parintilor
+    :param network: reteaua bayesiana
+    :param node: indicele nodului
+    :param codes: un dictionar indice nod:vector de valori esantionate
+    :param size: numarul de esantioane
+    :param log_space: True pentru randurile cu logaritmii probabilitatilor
+    :return: o matrice (nr. esantioane, nr. valori ale nodului)
+    """
+    table = (network.log_cpts if log_space else network.cpts)[node].reshape(-1, len(network.domains[node]))
+    row = np.zeros(size, dtype=np.int64)
+    for parent, stride in zip(network.parent_indices[node], network.parent_strides[node]):
+        row += codes[parent] * stride
+    return table[row]
+
+
+def log_normalized(log_scores):
+    """
+    Functie care transforma randurile unei matrice de logaritmi in ponderi relative, scazand maximul fiecarui rand
+    :param log_scores: o matrice (nr. esantioane, nr. valori) de logaritmi
+    :return: matricea exp(log_scores - maximul randului); randurile numai cu -inf devin 0
+    """
+    peak = log_scores.max(axis=1, keepdims=True)
+    peak[~np.isfinite(peak)] = 0.0
+    return np.exp(log_scores - peak)
+
+
+def budget_left(n_done, n_samples, started, time_limit):
+    """
+    Functie care verifica daca mai exista buget de esantionare (numar de esantioane sau timp)
+    """
+    if n_samples is not None and n_done >= n_samples:
+        return False
+    if time_limit is not None and time.perf_counter() - started >= time_limit:
+        return False
+    return True
+
+
+def likelihood_weighting(network, query_node, assignment, n_samples=None, time_limit=None,
+                         block_size=10000, rng=None):
+    """
+    Functie care estimeaza distributia nodului interogat prin likelihood weighting: nodurile
+    neobservate se esantioneaza in ordine topologica, iar fiecare esantion este ponderat cu
+    probabilitatea evidentelor
+    :param network: reteaua bayesiana
+    :param query_node: indicele nodului interogat
+    :param assignment: indicii valorilor observate pentru fiecare nod (-1 pentru nodurile neobservate)
+    :param n_samples: numarul de esantioane dorit
+    :param time_limit: timpul maxim de calcul, in secunde
+    :param block_size: numarul de esantioane generate simultan
+    :param rng: generatorul de numere aleatoare (numpy.random.Generator)
+    :return: un obiect SamplingResult
+    """
+    rng = rng or np.random.default_rng()
+    if n_samples is None and time_limit is None:
+        n_samples = 100000
+    started = time.perf_counter()
+
+    # doar stramosii interogarii si ai evidentelor influenteaza rezultatul
+    observed = [node for node, value in enumerate(assignment) if value >= 0]
+    nodes = sorted(network.ancestors(observed + [query_node]))
+    k = len(network.domains[query_node])
+
+    # sume acumulate pentru estimatorul ponderat si eroarea sa standard; ponderile sunt pastrate
+    # relativ la exp(scale), cel mai mare logaritm de pondere intalnit, astfel incat nu ajung la 0
+    sum_w, sum_w2 = 0.0, 0.0
+    sum_wi, sum_w2i = np.zeros(k), np.zeros(k)
+    scale = -np.inf
+    n_done = 0
+    monitor = network.monitor
+    if monitor is not None:
+        monitor.start(n_samples)
+    while budget_left(n_done, n_samples, started, time_limit):
+        size = block_size if n_samples is None else min(block_size, n_samples - n_done)
+        codes = {}
+        log_weights = np.zeros(size)
+        for node in nodes:
+            if assignment[node] >= 0:
+                codes[node] = np.full(size, assignment[node])
+                log_weights += cpt_rows(network, node, codes, size, log_space=True)[:, assignment[node]]
+            else:
+                codes[node] = sample_categorical(cpt_rows(network, node, codes, size), rng)
+
+        block_max = log_weights.max()
+        if block_max > scale:
+            if np.isfinite(scale):
+                shrink = np.exp(scale - block_max)
+                sum_w, sum_wi = sum_w * shrink, sum_wi * shrink
+                sum_w2, sum_w2i = sum_w2 * shrink ** 2, sum_w2i * shrink ** 2
+            scale = block_max
+        weights = np.exp(log_weights - scale) if np.isfinite(scale) else np.zeros(size)
+
+        indicator = np.eye(k)[codes[query_node]]
+        sum_w += weights.sum()
+        sum_w2 += (weights ** 2).sum()
+        sum_wi += weights @ indicator
+        sum_w2i += (weights ** 2) @ indicator
+        n_done += size
+        if monitor is not None:
+            monitor.step(size)
+
+    if sum_w == 0:
+        raise ValueError("No sample is consistent with the evidence")
+    probs = sum_wi / sum_w
+    std_error = np.sqrt(np.maximum(sum_w2i * (1 - 2 * probs) + probs ** 2 * sum_w2, 0.0)) / sum_w
+    # ponderea medie estimeaza P(E=e)
+    log_evidence = float(np.log(sum_w / n_done) + scale)
+    return SamplingResult(dict(zip(network.domains[query_node], probs.tolist())),
+                          dict(zip(network.domains[query_node], std_error.tolist())),
+                          n_done, time.perf_counter() - started, "likelihood_weighting", log_evidence)
+
+
+def gibbs_sampling(network, query_node, assignment, n_samples=None, time_limit=None,
+                   n_chains=100, burn_in=100, rng=None):
+    """
+    Functie care estimeaza distributia nodului interogat prin Gibbs sampling, cu mai multe lanturi
+    rulate simultan; fiecare nod neobservat este reesantionat din distributia data de patura sa Markov
+    :param network: reteaua bayesiana
+    :param query_node: indicele nodului interogat
+    :param assignment: indicii valorilor observate pentru fiecare nod (-1 pentru nodurile neobservate)
+    :param n_samples: numarul de esantioane dorit (insumat pe toate lanturile, fara burn-in)
+    :param time_limit: timpul maxim de calcul, in secunde
+    :param n_chains: numarul de lanturi paralele
+    :param burn_in: numarul de treceri ignorate la inceput
+    :param rng: generatorul de numere aleatoare (numpy.random.Generator)
+    :return: un obiect SamplingResult
+    """
+    rng = rng or np.random.default_rng()
+    if n_samples is None and time_limit is None:
+        n_samples = 100000
+    started = time.perf_counter()
+
+    # se lucreaza doar cu tabelele necesare interogarii (dupa Bayes-ball)
+    nodes = network.prune(query_node, assignment)
+    kept = set(nodes)
+    hidden = [node for node in nodes if assignment[node] < 0]
+    children = {node: [child for child in network.children[node] if child in kept] for node in hidden}
+
+    # starea initiala: esantioane likelihood weighting, reesantionate dupa pondere
+    init_size = max(10 * n_chains, 1000)
+    codes = {node: np.full(init_size, value) for node, value in enumerate(assignment) if value >= 0}
+    log_weights = np.zeros(init_size)
+    for node in nodes:
+        if assignment[node] >= 0:
+            log_weights += cpt_rows(network, node, codes, init_size, log_space=True)[:, assignment[node]]
+        else:
+            codes[node] = sample_categorical(cpt_rows(network, node, codes, init_size), rng)
+    if not np.isfinite(log_weights.max()):
+        raise ValueError("No sample is consistent with the evidence")
+    weights = np.exp(log_weights - log_weights.max())
+    chosen = rng.choice(init_size, size=n_chains, p=weights / weights.sum())
+    codes = {node: values[chosen] for node, values in codes.items()}
+
+    k = len(network.domains[query_node])
+    counts = np.zeros((n_chains, k))
+    sweeps, n_done = 0, 0
+    monitor = network.monitor
+    if monitor is not None:
+        monitor.start(n_samples)
+    while sweeps <= burn_in or budget_left(n_done, n_samples, started, time_limit):
+        for node in hidden:
+            # log P(nod | parinti) + suma log P(copil | parintii copilului), pentru fiecare valoare a nodului
+            scores = cpt_rows(network, node, codes, n_chains, log_space=True)
+            for value in range(scores.shape[1]):
+                codes[node] = np.full(n_chains, value)
+                for child in children[node]:
+                    scores[:, value] += cpt_rows(network, child, codes, n_chains,
+                                                 log_space=True)[np.arange(n_chains), codes[child]]
+            codes[node] = sample_categorical(log_normalized(scores), rng)
+        sweeps += 1
+        if sweeps > burn_in:
+            counts[np.arange(n_chains), codes[query_node]] += 1
+            n_done += n_chains
+        if monitor is not None:
+            monitor.step(n_chains if sweeps > burn_in else 0)
+
+    # eroarea standard se estimeaza din variatia estimarilor intre lanturi
+    chain_probs = counts / counts.sum(axis=1, keepdims=True)
+    probs = chain_probs.mean(axis=0)
+    std_error = chain_probs.std(axis=0, ddof=1) / np.sqrt(n_chains) if n_chains > 1 else np.full(k, np.nan)
+    return SamplingResult(dict(zip(network.domains[query_node], probs.tolist())),
+                          dict(zip(network.domains[query_node], std_error.tolist())),
+                          n_done, time.perf_counter() - started, "gibbs")
@@ -0,0 +1,352 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+import numpy as np
+from bayesian_network import BayesianNetwork
+from cli import p_e_fields, request_fields
+
+"""
+Modulul server implementeaza un server HTTP local (asyncio) care incarca o singura data una sau mai multe
+retele cu nume si raspunde interogarilor trimise ca JSON prin POST:
+    /query        {"network": "n", "query": "S3", "evidence": {...}}   -> enumeration_ask
+    /pe           {"network": "n", "evidence": {...}}                  -> p_e_query
+    /irrelevant   {"network": "n", "query": "S3", "evidence": {...}}   -> find_irrelevant_nodes
+    /metrics      (GET) latentele fiecarui endpoint
+Campul "network" poate lipsi daca serverul are o singura retea. Inferenta ruleaza intr-un grup de procese,
+astfel incat bucla de evenimente ramane libera, iar cererile identice primite in acelasi timp
+asteapta acelasi calcul.
+"""
+# retelele procesului curent, setate o singura data de initializatorul fiecarui proces
+worker_networks = None
+
+
+def init_worker(networks):
+    """
+    Functie care initializeaza un proces al serverului: retine retelele primite
+    :param networks: un dictionar nume:retea bayesiana
+    """
+    global worker_networks
+    worker_networks = networks
+
+
+def infer(endpoint, name, query, evidence, algorithm, log_space):
+    """
+    Functie executata in procese: raspunde unei interogari /query sau /pe
+    :param endpoint: "query" sau "pe"
+    :param name: numele retelei
+    :param query: nodul interogat (pentru /query)
+    :param evidence: un dictionar de perechi nod:valoare
+    :param algorithm: algoritmul de inferenta exacta
+    :param log_space: True pentru calcul in spatiul logaritmic
+    :return: raspunsul, un dictionar serializabil JSON
+    """
+    network = worker_networks[name]
+    if endpoint == "query":
+        network.set_evidence(evidence)
+        return {"query": query, "posterior": network.enumeration_ask(query, algorithm=algorithm,
+                                                                     log_space=log_space)}
+    return p_e_fields(network, evidence, algorithm, log_space)
+
+
+"""
+Clasa EndpointStats retine numarul de cereri si latentele recente ale unui endpoint
+"""
+class EndpointStats:
+    def __init__(self, window=10000):
+        """
+        Constructorul clasei EndpointStats
+        :param window: numarul de latente recente pastrate pentru percentile
+        """
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.coalesced = 0
+
+    def record(self, latency, error):
+        """
+        Functie care inregistreaza o cerere terminata
+        :param latency: durata cererii, in secunde
+        :param error: True daca cererea s-a terminat cu eroare
+        """
+        self.requests += 1
+        self.errors += error
+        self.latencies.append(latency)
+
+    def snapshot(self):
+        """
+        Functie care returneaza statisticile endpoint-ului
+        :return: un dictionar cu numarul de cereri si latentele medie, p50, p99 si maxima (in milisecunde)
+        """
+        stats = {"requests": self.requests, "errors": self.errors, "coalesced": self.coalesced}
+        if self.latencies:
+            latencies = np.asarray(self.latencies) * 1000
+            p50, p99 = np.percentile(latencies, [50, 99])
+            stats.update(mean_ms=float(latencies.mean()), p50_ms=float(p50), p99_ms=float(p99),
+                         max_ms=float(latencies.max()))
+        return stats
+
+
+"""
+Clasa RequestError descrie o cerere invalida, trimisa clientului cu codul HTTP dat
+"""
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+"""
+Clasa InferenceServer se ocupa de retelele incarcate, de grupul de procese si de cererile HTTP
+"""
+class InferenceServer:
+    ENDPOINTS = ("/query", "/pe", "/irrelevant")
+    # marimea maxima a corpului unei cereri, in octeti
+    MAX_BODY = 1 << 20
+
+    def __init__(self, networks, workers=None, algorithm="junction_tree"):
+        """
+        Constructorul clasei InferenceServer
+        Functie care incarca retelele si porneste grupul de procese
+        :param networks: un dictionar nume:fisier (JSON sau binar)
+        :param workers: numarul de procese (implicit numarul de procesoare)
+        :param algorithm: algoritmul de inferenta exacta folosit de /query si /pe
+        """
+        self.networks = {name: BayesianNetwork(path) for name, path in networks.items()}
+        self.algorithm = algorithm
+        if algorithm == "junction_tree":
+            # arborii de clici se construiesc o singura data si sunt trimisi proceselor impreuna cu retelele
+            for network in self.networks.values():
+                network.compile()
+        self.executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                            initializer=init_worker, initargs=(self.networks,))
+        # calculele in curs, dupa cheia canonica a cererii
+        self.in_flight = {}
+        self.stats = {endpoint: EndpointStats() for endpoint in self.ENDPOINTS}
+
+    def close(self):
+        """
+        Functie care opreste grupul de procese
+        """
+        self.executor.shutdown()
+
+    def network_name(self, request):
+        """
+        Functie care afla reteaua ceruta
+        :param request: corpul cererii
+        :return: numele retelei
+        """
+        name = request.get("network")
+        if name is not None and not isinstance(name, str):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "'network' must be a string")
+        if name is None and len(self.networks) == 1:
+            return next(iter(self.networks))
+        if name not in self.networks:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown network: {name}")
+        return name
+
+    async def coalesced(self, endpoint, key, compute):
+        """
+        Functie care ruleaza un calcul in grupul de procese; cererile identice care sosesc
+        cat timp calculul este in curs asteapta acelasi rezultat
+        :param endpoint: endpoint-ul cererii
+        :param key: cheia canonica a cererii
+        :param compute: argumentele functiei infer
+        :return: rezultatul calculului
+        """
+        future = self.in_flight.get(key)
+        if future is not None:
+            self.stats[endpoint].coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().run_in_executor(self.executor, infer, *compute)
+        self.in_flight[key] = future
+        future.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def handle(self, endpoint, request):
+        """
+        Functie care raspunde unei cereri catre un endpoint de inferenta
+        :param endpoint: "/query", "/pe" sau "/irrelevant"
+        :param request: corpul cererii, un dictionar
+        :return: raspunsul, un dictionar serializabil JSON
+        """
+        name = self.network_name(request)
+        network = self.networks[name]
+        try:
+            query, evidence = request_fields(request)
+        except ValueError as e:
+            raise RequestError(HTTPStatus.BAD_REQUEST, str(e))
+        if endpoint != "/pe" and query is None:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "'query' must be a string")
+        if endpoint != "/pe" and query not in network.node_index:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Unknown query node: {query}")
+        for node, value in evidence.items():
+            if node not in network.node_index or value not in network.value_index[network.node_index[node]]:
+                raise RequestError(HTTPStatus.BAD_REQUEST, f"Unknown evidence: {node}={value}")
+
+        if endpoint == "/irrelevant":
+            # Bayes-ball este liniar in marimea retelei, deci nu merita trimis altui proces
+            return {"network": name, "query": query, "irrelevant": network.find_irrelevant_nodes(query, evidence)}
+
+        log_space = bool(request.get("log_space", False))
+        kind = endpoint.lstrip("/")
+        if kind == "pe":
+            query = None
+        key = json.dumps([kind, name, query, sorted(evidence.items()), log_space])
+        try:
+            result = await self.coalesced(endpoint, key, (kind, name, query, evidence, self.algorithm, log_space))
+        except ValueError as e:
+            raise RequestError(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+        return {"network": name, **result}
+
+    async def respond(self, method, path, body):
+        """
+        Functie care alege raspunsul unei cereri HTTP
+        :param method: metoda HTTP
+        :param path: calea cererii
+        :param body: corpul cererii, in octeti
+        :return: codul HTTP si raspunsul, un dictionar serializabil JSON
+        """
+        if path == "/metrics":
+            if method != "GET":
+                raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, "Use GET")
+            return HTTPStatus.OK, {endpoint: stats.snapshot() for endpoint, stats in self.stats.items()}
+        if path == "/networks":
+            return HTTPStatus.OK, {name: {"nodes": network.nodes} for name, network in self.networks.items()}
+        if path not in self.ENDPOINTS:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"Unknown endpoint: {path}")
+        if method != "POST":
+            raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST with a JSON body")
+        try:
+            request = json.loads(body or b"{}")
+        except json.JSONDecodeError as e:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid JSON: {e}")
+        if not isinstance(request, dict):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "The body must be a JSON object")
+
+        started = time.perf_counter()
+        error = True
+        try:
+            result = await self.handle(path, request)
+            error = False
+            return HTTPStatus.OK, result
+        finally:
+            self.stats[path].record(time.perf_counter() - started, error)
+
+    @staticmethod
+    def content_length(headers):
+        """
+        Functie care citeste marimea corpului unei cereri
+        :param headers: un dictionar antet:valoare, cu numele antetelor scrise cu litere mici
+        :return: numarul de octeti ai corpului
+        """
+        value = headers.get("content-length", "0")
+        try:
+            length = int(value)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Invalid Content-Length: {value}")
+        return length
+
+    async def serve_client(self, reader, writer):
+        """
+        Functie care trateaza o conexiune: citeste cererile HTTP/1.1 una dupa alta (keep-alive)
+        :param reader: fluxul de intrare al conexiunii
+        :param writer: fluxul de iesire al conexiunii
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    header, _, value = line.decode("latin-1").partition(":")
+                    headers[header.strip().lower()] = value.strip()
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                body = None
+                try:
+                    length = self.content_length(headers)
+                    if length > self.MAX_BODY:
+                        raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+                    body = await reader.readexactly(length)
+                    status, payload = await self.respond(method, target.split("?", 1)[0], body)
+                except RequestError as e:
+                    status, payload = e.status, {"error": str(e)}
+                    # daca corpul nu a fost citit, conexiunea nu mai poate fi refolosita
+                    keep_alive = keep_alive and body is not None
+                except Exception as e:
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"}
+
+                data = json.dumps(payload, allow_nan=False).encode("utf-8")
+                writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                             f"Content-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8000):
+        """
+        Functie care porneste serverul si raspunde cererilor pana la oprire
+        :param host: adresa pe care asculta serverul (implicit doar local)
+        :param port: portul
+        """
+        server = await asyncio.start_server(self.serve_client, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def parse_networks(specs):
+    """
+    Functie care citeste retelele din linia de comanda
+    :param specs: o lista de elemente nume=fisier sau fisier (numele este atunci numele fisierului fara extensie)
+    :return: un dictionar nume:fisier
+    """
+    networks = {}
+    for spec in specs:
+        name, separator, path = spec.partition("=")
+        if not separator:
+            path = spec
+            name = os.path.splitext(os.path.basename(spec))[0]
+        networks[name] = path
+    return networks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve Bayesian network inference over local HTTP.")
+    parser.add_argument("networks", nargs="+", help="networks to preload, as name=path or path")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="port to listen on")
+    parser.add_argument("--workers", type=int, help="number of worker processes (default: CPU count)")
+    parser.add_argument("--algorithm", default="junction_tree",
+                        choices=["enumeration", "memoized", "variable_elimination", "junction_tree"],
+                        help="exact inference algorithm")
+    arguments = parser.parse_args()
+
+    inference_server = InferenceServer(parse_networks(arguments.networks), arguments.workers, arguments.algorithm)
+    try:
+        asyncio.run(inference_server.serve(arguments.host, arguments.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        inference_server.close()
@@ -0,0 +1,56 @@
+import io
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import cli
+from bayesian_network import BayesianNetwork
+
+"""
+Verificari de regresie pentru cli.run: liniile invalide (inclusiv cele cu tipuri gresite) primesc
+cate o eroare proprie, iar liniile valide din acelasi bloc primesc in continuare raspunsuri
+"""
+NETWORK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test1_network.json")
+LINES = [
+    '{"id": 1, "query": "Febra", "evidence": {"Gripa": "Da"}}\n',
+    '{"id": 2, "query": ["Febra"]}\n',
+    '{"id": 3, "evidence": {"Gripa": ["Da"]}}\n',
+    'not json\n',
+    '{"id": 5, "evidence": {"Gripa": "Da"}}\n',
+]
+
+
+class MalformedLinesTest(unittest.TestCase):
+    def check_run(self, workers):
+        output = io.StringIO()
+        stats = cli.run(BayesianNetwork(NETWORK), LINES, output, workers=workers)
+        responses = [cli.parse_line(line)[0] for line in output.getvalue().splitlines()]
+        self.assertEqual(stats["queries"], len(LINES))
+        self.assertEqual(stats["errors"], 3)
+        self.assertIn("posterior", responses[0])
+        self.assertEqual(responses[1]["error"], "'query' must be a string")
+        self.assertEqual(responses[2]["error"], "Evidence values must be strings")
+        self.assertIn("error", responses[3])
+        self.assertAlmostEqual(responses[4]["p_e"], 0.1)
+
+    def test_serial(self):
+        self.check_run(1)
+
+    def test_workers(self):
+        self.check_run(2)
+
+
+
+class ImpossibleEvidenceTest(unittest.TestCase):
+    def test_log_space(self):
+        # log P(e) = -inf nu este JSON valid, deci se scrie null
+        output = io.StringIO()
+        lines = ['{"evidence": {"S1": "B1", "S2": "B4"}}\n']
+        cli.run(BayesianNetwork(NETWORK.replace("test1", "test2")), lines, output, log_space=True)
+        self.assertEqual(json.loads(output.getvalue()), {"p_e": 0.0, "log_p_e": None})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,218 @@
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import unittest
+from itertools import product
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+from bayesian_network import BayesianNetwork
+from generate import generate_network
+from inference_session import InferenceSession
+
+"""
+Verificari de echivalenta pentru algoritmii de inferenta: distributiile, P(E=e), loturile, sesiunea
+incrementala si MAP/MPE trebuie sa coincida cu rezultatele calculate direct din distributia comuna
+(produsul tabelelor din fisierul JSON, pentru toate atribuirile), in spatiul liniar si in cel logaritmic
+"""
+ALGORITHMS = ("enumeration", "memoized", "variable_elimination", "junction_tree")
+PLACES = 9
+
+
+class JointDistribution:
+    def __init__(self, data):
+        """
+        Constructorul clasei JointDistribution
+        Functie care calculeaza probabilitatea fiecarei atribuiri complete direct din tabelele JSON
+        :param data: reteaua in schema JSON ({"nodes": {...}})
+        """
+        nodes = data["nodes"]
+        self.nodes = list(nodes)
+        self.domains = {}
+        for node, spec in nodes.items():
+            row = spec["probabilities"] if not spec["parents"] else next(iter(spec["probabilities"].values()))
+            self.domains[node] = list(row)
+        self.rows = []
+        for values in product(*(self.domains[node] for node in self.nodes)):
+            assignment = dict(zip(self.nodes, values))
+            probability = 1.0
+            for node, spec in nodes.items():
+                table = spec["probabilities"]
+                if spec["parents"]:
+                    table = table[",".join(assignment[parent] for parent in spec["parents"])]
+                probability *= table[assignment[node]]
+            self.rows.append((assignment, probability))
+
+    def matching(self, evidence):
+        """
+        Functie care returneaza atribuirile compatibile cu evidentele
+        :param evidence: un dictionar de perechi nod:valoare
+        :return: o lista de perechi (atribuire, probabilitate)
+        """
+        return [(assignment, probability) for assignment, probability in self.rows
+                if all(assignment[node] == value for node, value in evidence.items())]
+
+    def p_e(self, evidence):
+        """
+        Functie care calculeaza probabilitatea evidentelor P(E=e) prin sumarea atribuirilor compatibile
+        """
+        return sum(probability for _, probability in self.matching(evidence))
+
+    def posterior(self, node, evidence):
+        """
+        Functie care calculeaza distributia unui nod data fiind evidenta (None daca evidenta este imposibila)
+        """
+        totals = dict.fromkeys(self.domains[node], 0.0)
+        for assignment, probability in self.matching(evidence):
+            totals[assignment[node]] += probability
+        total = sum(totals.values())
+        return None if total == 0 else {value: weight / total for value, weight in totals.items()}
+
+    def map_probability(self, nodes, evidence):
+        """
+        Functie care calculeaza max peste valorile nodurilor date din P(x, e), sumand celelalte noduri
+        """
+        totals = {}
+        for assignment, probability in self.matching(evidence):
+            key = tuple(assignment[node] for node in nodes)
+            totals[key] = totals.get(key, 0.0) + probability
+        return max(totals.values())
+
+
+class InferenceEquivalenceTest(unittest.TestCase):
+    def setUp(self):
+        self.networks = []
+        for name in ("test1_network.json", "test2_network.json"):
+            with open(os.path.join(ROOT, name)) as file:
+                self.networks.append((os.path.join(ROOT, name), json.load(file)))
+        # o retea generata cu mai multi parinti si domenii de marimi diferite
+        data = generate_network("random_dag", 8, domain_size=(2, 3), max_in_degree=3, seed=5)
+        handle, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(handle, "w") as file:
+            json.dump(data, file)
+        self.addCleanup(os.remove, path)
+        self.networks.append((path, data))
+
+    def evidence_sets(self, joint, seed=0, count=8):
+        """
+        Functie care alege seturi de evidente aleatoare (reproductibile), inclusiv setul vid
+        """
+        rng = random.Random(seed)
+        sets = [{}]
+        for _ in range(count):
+            nodes = rng.sample(joint.nodes, rng.randint(1, min(3, len(joint.nodes) - 1)))
+            sets.append({node: rng.choice(joint.domains[node]) for node in nodes})
+        return sets
+
+    def assertDistribution(self, result, expected, message):
+        self.assertEqual(list(result), list(expected), message)
+        for value in expected:
+            self.assertAlmostEqual(result[value], expected[value], places=PLACES, msg=message)
+
+    def test_posteriors(self):
+        for path, data in self.networks:
+            joint = JointDistribution(data)
+            for evidence in self.evidence_sets(joint):
+                for node in joint.nodes:
+                    # ca in enumeration_ask, evidenta nodului interogat nu se foloseste
+                    expected = joint.posterior(node, {n: v for n, v in evidence.items() if n != node})
+                    if expected is None:
+                        # distributia nu este definita pentru evidente imposibile; algoritmii care elimina
+                        # nodurile d-separate pot ignora evidenta imposibila, deci nu se compara
+                        continue
+                    for algorithm, log_space in product(ALGORITHMS, (False, True)):
+                        network = BayesianNetwork(path)
+                        network.set_evidence(dict(evidence))
+                        message = f"{path} {node} {evidence} {algorithm} log_space={log_space}"
+                        result = network.enumeration_ask(node, algorithm=algorithm, log_space=log_space)
+                        self.assertDistribution(result, expected, message)
+
+    def test_probability_of_evidence(self):
+        for path, data in self.networks:
+            joint = JointDistribution(data)
+            network = BayesianNetwork(path)
+            for evidence in self.evidence_sets(joint, seed=1):
+                expected = joint.p_e(evidence)
+                for algorithm in ALGORITHMS:
+                    message = f"{path} {evidence} {algorithm}"
+                    self.assertAlmostEqual(network.p_e_query(evidence, algorithm=algorithm), expected,
+                                           places=PLACES, msg=message)
+                    log_p_e = network.log_p_e_query(evidence, algorithm=algorithm)
+                    if expected == 0:
+                        self.assertEqual(log_p_e, -math.inf, message)
+                    else:
+                        self.assertAlmostEqual(log_p_e, math.log(expected), places=PLACES, msg=message)
+
+    def test_query_batch(self):
+        for path, data in self.networks:
+            joint = JointDistribution(data)
+            network = BayesianNetwork(path)
+            query = joint.nodes[-1]
+            rows = [{n: v for n, v in evidence.items() if n != query} for evidence in self.evidence_sets(joint, 2)]
+            for log_space in (False, True):
+                batch = network.query_batch(query, rows, log_space=log_space)
+                for row, evidence in zip(batch, rows):
+                    expected = joint.posterior(query, evidence)
+                    if expected is None:
+                        self.assertTrue(np.isnan(row).all())
+                    else:
+                        self.assertDistribution(dict(zip(joint.domains[query], row.tolist())), expected,
+                                                f"{path} {evidence} log_space={log_space}")
+
+    def test_session(self):
+        for path, data in self.networks:
+            joint = JointDistribution(data)
+            for log_space in (False, True):
+                network = BayesianNetwork(path)
+                network.compile(log_space)
+                session = InferenceSession(network)
+                # evidentele se adauga si se retrag pe rand, ca in interfata grafica
+                for evidence in self.evidence_sets(joint, seed=3, count=4):
+                    session.reset()
+                    for node, value in evidence.items():
+                        session.observe(node, value)
+                        expected_p_e = joint.p_e(session.evidence)
+                        p_e = session.probability_of_evidence()
+                        self.assertAlmostEqual(math.exp(p_e) if log_space else p_e, expected_p_e, places=PLACES)
+                        for query in joint.nodes:
+                            expected = joint.posterior(
+                                query, {n: v for n, v in session.evidence.items() if n != query})
+                            if expected is not None:
+                                self.assertDistribution(session.posterior(query), expected,
+                                                        f"{path} {query} {session.evidence}")
+
+    def test_map_and_mpe(self):
+        for path, data in self.networks:
+            joint = JointDistribution(data)
+            network = BayesianNetwork(path)
+            rng = random.Random(4)
+            for evidence in self.evidence_sets(joint, seed=4, count=5):
+                if joint.p_e(evidence) == 0:
+                    continue
+                hidden = [node for node in joint.nodes if node not in evidence]
+                if not hidden:
+                    continue
+                queries = [("mpe", hidden), ("map", rng.sample(hidden, rng.randint(1, len(hidden))))]
+                for (kind, nodes), log_space in product(queries, (False, True)):
+                    if kind == "mpe":
+                        assignment, probability = network.mpe(evidence, log_space=log_space)
+                    else:
+                        assignment, probability = network.map_query(nodes, evidence, log_space=log_space)
+                    if log_space:
+                        probability = math.exp(probability)
+                    message = f"{path} {kind} {nodes} {evidence} log_space={log_space}"
+                    self.assertEqual(sorted(assignment), sorted(nodes), message)
+                    # la egalitate pot exista mai multe atribuiri optime, deci se compara probabilitatile
+                    expected = joint.map_probability(nodes, evidence)
+                    self.assertAlmostEqual(probability, expected, places=PLACES, msg=message)
+                    self.assertAlmostEqual(joint.p_e({**evidence, **assignment}), expected, places=PLACES,
+                                           msg=message)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from bayesian_network import BayesianNetwork
+from learning import ParameterLearner
+
+"""
+Verificari de regresie pentru ParameterLearner.fit_file: o linie JSON invalida sau care nu este un obiect
+produce un ValueError cu numele fisierului si numarul liniei, iar numaratorile raman cele dinaintea fisierului
+"""
+class MalformedDataTest(unittest.TestCase):
+    def setUp(self):
+        self.network = BayesianNetwork(os.path.join(ROOT, "test1_network.json"))
+        self.row = {node: self.network.domains[index][0] for index, node in enumerate(self.network.nodes)}
+
+    def write_jsonl(self, last_line):
+        handle, path = tempfile.mkstemp(suffix=".jsonl")
+        with os.fdopen(handle, "w") as file:
+            file.write("".join(json.dumps(self.row) + "\n" for _ in range(5)))
+            file.write("\n" + last_line + "\n")
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_malformed_lines(self):
+        not_object = "each line must be a JSON object"
+        for last_line, message in (("[1, 2]", not_object), ("5", not_object), ('{"Gripa": ', "invalid JSON")):
+            path = self.write_jsonl(last_line)
+            learner = ParameterLearner(self.network)
+            # blocurile mici fac ca primele randuri sa fie deja numarate cand apare eroarea
+            with self.assertRaises(ValueError) as context:
+                learner.fit_file(path, chunk_size=2)
+            self.assertIn(f"{path}, line 7: {message}", str(context.exception))
+            self.assertEqual(learner.rows_seen, 0)
+            self.assertTrue(all(counts.sum() == 0 for counts in learner.counts))
+
+    def test_valid_file(self):
+        learner = ParameterLearner(self.network)
+        self.assertEqual(learner.fit_file(self.write_jsonl(json.dumps(self.row)), chunk_size=2), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,350 @@
+import heapq
+import math
+import numpy as np
+
+"""
+Modulul variable_elimination implementeaza inferenta prin eliminarea variabilelor
+(produs de factori, sumare si restrictie) pentru retelele bayesiene, precum si varianta max-produs
+folosita pentru explicatia cea mai probabila (MPE/MAP).
+Factorii sunt tabele numpy cu cate o axa pentru fiecare variabila; in modul logaritmic
+tabelele contin logaritmii probabilitatilor, produsul devine suma si suma devine log-sum-exp.
+"""
+def log_sum_exp(table, axis):
+    """
+    Functie care calculeaza log(suma(exp(table))) pe o axa, fara depasiri inferioare
+    :param table: un numpy.ndarray de logaritmi
+    :param axis: axa pe care se face suma
+    :return: tabelul fara axa data
+    """
+    peak = np.max(table, axis=axis, keepdims=True)
+    peak = np.where(np.isfinite(peak), peak, 0.0)
+    with np.errstate(divide="ignore"):
+        return np.log(np.exp(table - peak).sum(axis=axis)) + np.squeeze(peak, axis=axis)
+
+
+def log_sum(terms):
+    """
+    Functie care calculeaza log(suma(exp(t))) pentru o lista de logaritmi, varianta scalara folosita de enumerare
+    :param terms: lista de logaritmi
+    :return: logaritmul sumei (-inf daca toti termenii sunt -inf)
+    """
+    peak = max(terms)
+    if peak == -math.inf:
+        return peak
+    return peak + math.log(sum(math.exp(term - peak) for term in terms))
+
+
+class Factor:
+    def __init__(self, variables, table, log_space=False):
+        """
+        Constructorul clasei Factor
+        :param variables: lista variabilelor (indicii nodurilor) din care depinde factorul
+        :param table: un numpy.ndarray cu cate o axa pentru fiecare variabila, in ordinea din variables
+        :param log_space: True daca tabelul contine logaritmii probabilitatilor
+        """
+        self.variables = tuple(variables)
+        self.table = table
+        self.log_space = log_space
+
+    def aligned(self, variables):
+        """
+        Functie care aranjeaza axele tabelului in ordinea data
+        :param variables: o lista de variabile care le contine pe cele ale factorului
+        :return: tabelul, cu axe de dimensiune 1 pentru variabilele care lipsesc din factor
+        """
+        order = sorted(range(len(self.variables)), key=lambda axis: variables.index(self.variables[axis]))
+        table = self.table.transpose(order)
+        shape = [self.table.shape[self.variables.index(var)] if var in self.variables else 1
+                 for var in variables]
+        return table.reshape(shape)
+
+    def product(self, other):
+        """
+        Functie care inmulteste doi factori
+        :param other: celalalt factor
+        :return: un factor nou definit pe reuniunea variabilelor
+        """
+        variables = list(self.variables) + [var for var in other.variables if var not in self.variables]
+        if self.log_space:
+            return Factor(variables, self.aligned(variables) + other.aligned(variables), True)
+        return Factor(variables, self.aligned(variables) * other.aligned(variables))
+
+    def sum_out(self, variable):
+        """
+        Functie care elimina o variabila din factor prin sumare
+        :param variable: variabila eliminata
+        :return: un factor nou, fara variabila data
+        """
+        position = self.variables.index(variable)
+        variables = self.variables[:position] + self.variables[position + 1:]
+        if self.log_space:
+            return Factor(variables, log_sum_exp(self.table, position), True)
+        return Factor(variables, self.table.sum(axis=position))
+
+    def max_out(self, variable):
+        """
+        Functie care elimina o variabila din factor prin maximizare
+        :param variable: variabila eliminata
+        :return: un factor nou, fara variabila data, si un factor cu indicele valorii care da maximul
+                 pentru fiecare combinatie a variabilelor ramase
+        """
+        position = self.variables.index(variable)
+        variables = self.variables[:position] + self.variables[position + 1:]
+        return (Factor(variables, self.table.max(axis=position), self.log_space),
+                Factor(variables, self.table.argmax(axis=position)))
+
+    def restrict(self, variable, value):
+        """
+        Functie care fixeaza valoarea unei variabile (observate) in factor
+        :param variable: variabila observata
+        :param value: indicele valorii observate
+        :return: un factor nou, fara variabila data
+        """
+        position = self.variables.index(variable)
+        variables = self.variables[:position] + self.variables[position + 1:]
+        return Factor(variables, np.take(self.table, value, axis=position), self.log_space)
+
+
+def build_factors(network, nodes, assignment, log_space=False):
+    """
+    Functie care construieste factorii (tabelele de probabilitate conditionate) pentru nodurile date,
+    restrictionati la evidentele curente
+    :param network: reteaua bayesiana
+    :param nodes: indicii nodurilor pentru care se construiesc factorii
+    :param assignment: indicii valorilor observate pentru fiecare nod (-1 pentru nodurile neobservate)
+    :param log_space: True pentru factori cu logaritmii probabilitatilor
+    :return: o lista de factori
+    """
+    cpts = network.log_cpts if log_space else network.cpts
+    factors = []
+    for node in nodes:
+        factor = Factor(network.parent_indices[node] + (node,), cpts[node], log_space)
+        for var in factor.variables:
+            if assignment[var] >= 0:
+                factor = factor.restrict(var, assignment[var])
+        factors.append(factor)
+    return factors
+
+
+def elimination_order(factors, variables, heuristic="min_fill", last=()):
+    """
+    Functie care calculeaza o ordine de eliminare greedy pe graful de interactiune al factorilor
+    :param factors: lista factorilor
+    :param variables: variabilele care trebuie eliminate
+    :param heuristic: "min_fill" (muchii adaugate minime) sau "min_degree" (vecini minimi)
+    :param last: variabile eliminate dupa toate celelalte (de ex. variabilele maximizate ale unei interogari MAP)
+    :return: o lista cu ordinea de eliminare
+    """
+    if heuristic not in ("min_fill", "min_degree"):
+        raise ValueError(f"Unknown elimination heuristic: {heuristic}")
+
+    # graful de interactiune: doua variabile sunt vecine daca apar in acelasi factor
+    neighbors = {var: set() for factor in factors for var in factor.variables}
+    for factor in factors:
+        for var in factor.variables:
+            neighbors[var].update(v for v in factor.variables if v != var)
+
+    def cost(var):
+        if heuristic == "min_degree":
+            return len(neighbors[var])
+        adjacent = list(neighbors[var])
+        return sum(1 for i, a in enumerate(adjacent) for b in adjacent[i + 1:] if b not in neighbors[a])
+
+    order = []
+    for stage in (variables, last):
+        # costurile curente intr-un heap; dupa fiecare eliminare se recalculeaza doar costurile care se pot schimba,
+        # iar intrarile depasite din heap se sar. La cost egal se alege, ca inainte, variabila aparuta prima.
+        position = {var: i for i, var in enumerate(stage) if var in neighbors}
+        costs = {var: cost(var) for var in position}
+        heap = [(var_cost, position[var], var) for var, var_cost in costs.items()]
+        heapq.heapify(heap)
+        while heap:
+            var_cost, _, var = heapq.heappop(heap)
+            if costs.get(var) != var_cost:
+                continue
+            del costs[var]
+            order.append(var)
+            # vecinii variabilei eliminate devin o clica
+            adjacent = neighbors.pop(var)
+            for a in adjacent:
+                neighbors[a].discard(var)
+                neighbors[a].update(adjacent - {a})
+            # gradul se schimba doar pentru vecini; muchiile noi dintre vecini schimba si costul min_fill
+            # al vecinilor lor
+            changed = set(adjacent)
+            if heuristic == "min_fill":
+                for a in adjacent:
+                    changed.update(neighbors[a])
+            for v in changed:
+                if v in costs:
+                    v_cost = cost(v)
+                    if v_cost != costs[v]:
+                        costs[v] = v_cost
+                        heapq.heappush(heap, (v_cost, position[v], v))
+    return order
+
+
+def elimination_cost(network, factors, order):
+    """
+    Functie care estimeaza costul eliminarii variabilelor in ordinea data, fara a calcula factorii
+    :param network: reteaua bayesiana
+    :param factors: lista factorilor
+    :param order: ordinea de eliminare
+    :return: suma marimilor tabelelor intermediare create la eliminare
+    """
+    scopes = dict(enumerate(set(factor.variables) for factor in factors))
+    # scopurile in care apare fiecare variabila, pentru a nu parcurge toate scopurile la fiecare eliminare
+    containing = {}
+    for i, scope in scopes.items():
+        for v in scope:
+            containing.setdefault(v, set()).add(i)
+    next_id = len(scopes)
+    cost = 0
+    for var in order:
+        involved = containing.pop(var, None)
+        if not involved:
+            continue
+        combined = set().union(*(scopes.pop(i) for i in involved))
+        cost += math.prod(len(network.domains[v]) for v in combined)
+        combined.discard(var)
+        for v in combined:
+            containing[v] -= involved
+            containing[v].add(next_id)
+        scopes[next_id] = combined
+        next_id += 1
+    return cost
+
+
+def eliminate(factors, order, monitor=None, log_space=False, maximized=(), traceback=None):
+    """
+    Functie care elimina pe rand variabilele date, inmultind doar factorii care le contin
+    :param factors: lista factorilor
+    :param order: ordinea de eliminare
+    :param monitor: monitorul inferentei (progres si oprire), optional
+    :param log_space: True daca factorii contin logaritmi
+    :param maximized: variabilele eliminate prin maximizare in loc de sumare
+    :param traceback: lista in care se adauga, pentru fiecare variabila maximizata, perechea
+                      (variabila, factorul argmax), folosita apoi de max_product_assignment
+    :return: produsul factorilor ramasi
+    """
+    factors = list(factors)
+    if monitor is not None:
+        monitor.start(len(order))
+    for var in order:
+        if monitor is not None:
+            monitor.step()
+        involved = [f for f in factors if var in f.variables]
+        if not involved:
+            continue
+        factors = [f for f in factors if var not in f.variables]
+        combined = involved[0]
+        for factor in involved[1:]:
+            combined = combined.product(factor)
+        if var in maximized:
+            combined, best = combined.max_out(var)
+            if traceback is not None:
+                traceback.append((var, best))
+            factors.append(combined)
+        else:
+            factors.append(combined.sum_out(var))
+
+    if not factors:
+        return Factor((), np.array(0.0 if log_space else 1.0), log_space)
+    result = factors[0]
+    for factor in factors[1:]:
+        result = result.product(factor)
+    return result
+
+
+def variable_elimination_ask(network, query_node, assignment, nodes=None, heuristic="min_fill", log_space=False):
+    """
+    Functie care se ocupa de inferenta prin eliminarea variabilelor
+    :param network: reteaua bayesiana
+    :param query_node: indicele nodului interogat
+    :param assignment: indicii valorilor observate pentru fiecare nod (-1 pentru nodurile neobservate)
+    :param nodes: indicii nodurilor ale caror tabele se folosesc (implicit toate)
+    :param heuristic: euristica pentru ordinea de eliminare
+    :param log_space: True pentru calcul in spatiul logaritmic
+    :return: o lista de probabilitati nenormalizate (sau logaritmii lor) pt. valorile variabilei interogate
+    """
+    nodes = range(len(network.nodes)) if nodes is None else nodes
+    factors = build_factors(network, nodes, assignment, log_space)
+    hidden = [node for node in nodes if node != query_node and assignment[node] < 0]
+    result = eliminate(factors, elimination_order(factors, hidden, heuristic), network.monitor, log_space)
+    return result.table.tolist()
+
+
+def variable_elimination_p_e(network, assignment, nodes=None, heuristic="min_fill", log_space=False):
+    """
+    Functie care calculeaza probabilitatea evidentelor P(E=e) prin eliminarea variabilelor
+    :param network: reteaua bayesiana
+    :param assignment: indicii valorilor observate pentru fiecare nod (-1 pentru nodurile neobservate)
+    :param nodes: indicii nodurilor ale caror tabele se folosesc (implicit toate)
+    :param heuristic: euristica pentru ordinea de eliminare
+    :param log_space: True pentru calcul in spatiul logaritmic
+    :return: probabilitatea evidentelor (sau logaritmul ei)
+    """
+    nodes = range(len(network.nodes)) if nodes is None else nodes
+    factors = build_factors(network, nodes, assignment, log_space)
+    hidden = [node for node in nodes if assignment[node] < 0]
+    result = eliminate(factors, elimination_order(factors, hidden, heuristic), network.monitor, log_space)
+    return float(result.table)
+
+
+def max_product_assignment(network, assignment, nodes, maximized, heuristic="min_fill", log_space=False):
+    """
+    Functie care calculeaza atribuirea cea mai probabila a variabilelor maximizate prin eliminare max-produs:
+    celelalte variabile neobservate se elimina intai prin sumare, apoi variabilele maximizate prin maximizare,
+    iar valorile lor se refac in ordine inversa din factorii argmax (traceback)
+    :param network: reteaua bayesiana
+    :param assignment: indicii valorilor observate pentru fiecare nod (-1 pentru nodurile neobservate)
+    :param nodes: indicii nodurilor ale caror tabele se folosesc
+    :param maximized: indicii nodurilor neobservate pentru care se cauta atribuirea
+    :param heuristic: euristica pentru ordinea de eliminare
+    :param log_space: True pentru calcul in spatiul logaritmic
+    :return: un dictionar indice nod:indice valoare si probabilitatea comuna a atribuirii si a evidentelor
+             (logaritmul ei in modul logaritmic)
+    """
+    factors = build_factors(network, nodes, assignment, log_space)
+    maximized = set(maximized)
+    summed = [node for node in nodes if assignment[node] < 0 and node not in maximized]
+    order = elimination_order(factors, summed, heuristic, last=sorted(maximized))
+    traceback = []
+    result = eliminate(factors, order, network.monitor, log_space, maximized, traceback)
+
+    values = {}
+    for var, best in reversed(traceback):
+        # variabilele factorului argmax au fost eliminate dupa var, deci au deja valori
+        values[var] = int(best.table[tuple(values[v] for v in best.variables)])
+    return values, float(result.table)
+
+
+# eticheta axei de lot (batch) in factorii folositi de interogarile pe loturi
+BATCH = -1
+
+
+def variable_elimination_batch(network, query_node, n_rows, likelihoods, nodes=None, heuristic="min_fill",
+                               log_space=False):
+    """
+    Functie care calculeaza distributia nodului interogat pentru un lot de seturi de evidente
+    intr-o singura trecere; lotul este tratat ca o variabila suplimentara care nu se elimina
+    :param network: reteaua bayesiana
+    :param query_node: indicele nodului interogat
+    :param n_rows: numarul de seturi de evidente din lot
+    :param likelihoods: un dictionar indice nod:matrice (n_rows, nr. valori) cu 1 pentru valorile
+                        compatibile cu evidenta fiecarui rand si 0 in rest (0 si -inf in modul logaritmic)
+    :param nodes: indicii nodurilor ale caror tabele se folosesc (implicit toate)
+    :param heuristic: euristica pentru ordinea de eliminare
+    :param log_space: True pentru calcul in spatiul logaritmic
+    :return: o matrice (n_rows, nr. valori) de probabilitati nenormalizate (sau logaritmii lor)
+    """
+    nodes = range(len(network.nodes)) if nodes is None else nodes
+    factors = build_factors(network, nodes, [-1] * len(network.nodes), log_space)
+    factors += [Factor((BATCH, node), table, log_space) for node, table in likelihoods.items()]
+    hidden = [node for node in nodes if node != query_node]
+    result = eliminate(factors, elimination_order(factors, hidden, heuristic), network.monitor, log_space)
+
+    if BATCH not in result.variables:
+        # fara evidente toate randurile au aceeasi distributie
+        return np.broadcast_to(result.table, (n_rows, len(result.table))).copy()
+    return result.aligned([BATCH, query_node])